@@ -1,91 +1,137 @@
-from domain.models import Attendance, UserRole
+from domain.models import Attendance, AttendanceSession, BulkRowError, BulkWriteSummary, UserRole
 from infrastructure.database import db
+from application.utils.validation import Reference, class_ref, student_ref, require_references
+from application.utils.pagination import PageParams, paginate
+from application.utils.export import ExportParams, export_response
+from application.utils.utils import insert_many_unordered
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def record_attendance(attendance: Attendance, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Attendance recording failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def record_attendance(attendance: Attendance, user: dict):
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Attendance recording failed: User {username} not authorized")
+        logger.error(f"Attendance recording failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
-    if await db.attendance.find_one({"attendance_id": attendance.attendance_id}):
-        logger.error(f"Attendance recording failed: Attendance ID {attendance.attendance_id} already exists")
-        raise HTTPException(status_code=400, detail="Attendance ID already exists")
-    if not await db.students.find_one({"student_id": attendance.student_id}):
-        logger.error(f"Attendance recording failed: Student {attendance.student_id} not found")
-        raise HTTPException(status_code=404, detail="Student not found")
-    if not await db.classes.find_one({"class_id": attendance.class_id}):
-        logger.error(f"Attendance recording failed: Class {attendance.class_id} not found")
-        raise HTTPException(status_code=404, detail="Class not found")
+    await require_references(
+        "Attendance recording",
+        student_ref(attendance.student_id),
+        class_ref(attendance.class_id)
+    )
     attendance_doc = attendance.dict()
     attendance_doc["date"] = attendance.date.isoformat()
     try:
         await db.attendance.insert_one(attendance_doc)
+    except DuplicateKeyError:
+        logger.error(f"Attendance recording failed: Attendance ID {attendance.attendance_id} already exists")
+        raise HTTPException(status_code=400, detail="Attendance ID already exists")
     except Exception as e:
         logger.error(f"Failed to record attendance {attendance.attendance_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Attendance recorded: {attendance.attendance_id}")
     return attendance
 
-async def get_all_attendance(username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Attendance retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def record_attendance_bulk(session: AttendanceSession, user: dict) -> BulkWriteSummary:
+    """Record a whole class session: one class check, one $in student check and one unordered insert."""
+    if user["role"] not in [UserRole.admin, UserRole.teacher]:
+        logger.error(f"Bulk attendance recording failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not session.records:
+        logger.error(f"Bulk attendance recording failed: No records for class {session.class_id}")
+        raise HTTPException(status_code=400, detail="No attendance records")
+    await require_references("Bulk attendance recording", class_ref(session.class_id))
+
+    student_ids = list({record.student_id for record in session.records})
+    try:
+        known_students = {
+            student["student_id"]
+            async for student in db.students.find({"student_id": {"$in": student_ids}}, projection={"_id": 0, "student_id": 1})
+        }
+    except Exception as e:
+        logger.error(f"Bulk attendance recording failed for class {session.class_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    session_date = session.date.isoformat()
+    errors = []
+    documents = []
+    rows = []
+    seen_ids = set()
+    for row, record in enumerate(session.records):
+        if record.student_id not in known_students:
+            errors.append(BulkRowError(row=row, id=record.attendance_id, error="Student not found"))
+        elif record.attendance_id in seen_ids:
+            errors.append(BulkRowError(row=row, id=record.attendance_id, error="Duplicate attendance ID in request"))
+        else:
+            seen_ids.add(record.attendance_id)
+            rows.append(row)
+            documents.append({
+                "attendance_id": record.attendance_id,
+                "student_id": record.student_id,
+                "class_id": session.class_id,
+                "date": session_date,
+                "status": record.status.value
+            })
+
+    try:
+        inserted, failures = await insert_many_unordered(db.attendance, documents)
+    except Exception as e:
+        logger.error(f"Bulk attendance recording failed for class {session.class_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    for position, message in failures:
+        errors.append(BulkRowError(row=rows[position], id=documents[position]["attendance_id"], error=message))
+    errors.sort(key=lambda error: error.row)
+    logger.info(f"Bulk attendance recorded for class {session.class_id} on {session_date}: {inserted} inserted, {len(errors)} failed")
+    return BulkWriteSummary(received=len(session.records), inserted=inserted, failed=len(errors), errors=errors)
+
+async def get_all_attendance(user: dict, page: PageParams):
     try:
-        attendance = await db.attendance.find().to_list(length=None)
+        attendance = await paginate(db.attendance, page, key="attendance_id", model=Attendance, sort_fields=("date",))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to retrieve attendance: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info("Attendance retrieved")
-    return [Attendance(**record) for record in attendance]
+    return attendance
 
-async def update_attendance(attendance_id: str, attendance: Attendance, username: str):
+async def export_attendance(user: dict, params: ExportParams):
+    query = params.query("date")
+    logger.info(f"Attendance export started by {user['username']}: {query}")
+    return export_response(db.attendance, query, params, sort_field="date", filename="attendance")
+
+async def update_attendance(attendance_id: str, attendance: Attendance, user: dict):
     if not attendance_id or not isinstance(attendance_id, str):
         logger.error(f"Invalid attendance_id: {attendance_id}")
         raise HTTPException(status_code=400, detail="Invalid attendance ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Attendance update failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Attendance update failed: User {username} not authorized")
+        logger.error(f"Attendance update failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
-    existing_attendance = await db.attendance.find_one({"attendance_id": attendance_id})
-    if not existing_attendance:
-        logger.error(f"Attendance update failed: Attendance {attendance_id} not found")
-        raise HTTPException(status_code=404, detail="Attendance not found")
-    if not await db.students.find_one({"student_id": attendance.student_id}):
-        logger.error(f"Attendance update failed: Student {attendance.student_id} not found")
-        raise HTTPException(status_code=404, detail="Student not found")
-    if not await db.classes.find_one({"class_id": attendance.class_id}):
-        logger.error(f"Attendance update failed: Class {attendance.class_id} not found")
-        raise HTTPException(status_code=404, detail="Class not found")
+    await require_references(
+        "Attendance update",
+        Reference("attendance", "attendance_id", attendance_id, "Attendance"),
+        student_ref(attendance.student_id),
+        class_ref(attendance.class_id)
+    )
     attendance_doc = attendance.dict()
     attendance_doc["date"] = attendance.date.isoformat()
     try:
         await db.attendance.update_one({"attendance_id": attendance_id}, {"$set": attendance_doc})
+    except DuplicateKeyError:
+        logger.error(f"Attendance update failed: Attendance ID {attendance.attendance_id} already exists")
+        raise HTTPException(status_code=400, detail="Attendance ID already exists")
     except Exception as e:
         logger.error(f"Failed to update attendance {attendance_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Attendance updated: {attendance_id}")
     return attendance
 
-async def delete_attendance(attendance_id: str, username: str):
+async def delete_attendance(attendance_id: str, user: dict):
     if not attendance_id or not isinstance(attendance_id, str):
         logger.error(f"Invalid attendance_id: {attendance_id}")
         raise HTTPException(status_code=400, detail="Invalid attendance ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Attendance deletion failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Attendance deletion failed: User {username} not authorized")
+        logger.error(f"Attendance deletion failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
     existing_attendance = await db.attendance.find_one({"attendance_id": attendance_id})
     if not existing_attendance:
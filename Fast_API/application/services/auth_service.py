@@ -1,33 +1,96 @@
 from domain.models import User, LoginRequest, UserRole
 from infrastructure.database import db
+from application.utils.cache import TTLCache
+from config.settings import (
+    USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+)
 from passlib.context import CryptContext
+from jose import jwt, JWTError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+# bcrypt releases the GIL, so a small dedicated thread pool keeps hashing off the event loop
+# and caps how many hashes run at once without starving the default executor
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+user_cache = TTLCache("users", max_size=USER_CACHE_MAX_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+def invalidate_user(username: str):
+    """Drop a cached user so the next request re-reads it from the database."""
+    user_cache.invalidate(username)
+
+async def resolve_user(username: str) -> dict:
+    """Resolve a username to its user record (without the password hash), using the user cache."""
+    user = user_cache.get(username)
+    if user is None:
+        user = await db.users.find_one({"username": username}, projection={"_id": 0, "password": 0})
+        if not user:
+            logger.error(f"Authentication failed: User {username} not found")
+            raise HTTPException(status_code=401, detail="User not found")
+        user_cache.set(username, user)
+    return user
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the password hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the password hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify, password, hashed_password)
+
+def create_access_token(username: str, role: str) -> str:
+    """Issue a signed access token carrying the username and role claims."""
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": username,
+        "role": role,
+        "iat": now,
+        "exp": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+def verify_access_token(token: str) -> dict:
+    """Verify an access token's signature and expiry and return the user it was issued to."""
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as e:
+        logger.error(f"Authentication failed: Invalid token: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    if not claims.get("sub") or not claims.get("role"):
+        logger.error("Authentication failed: Token is missing required claims")
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    return {"username": claims["sub"], "role": claims["role"]}
 
 async def register_user(user: User):
-    if await db.users.find_one({"username": user.username}):
-        logger.error(f"Registration failed: Username {user.username} already exists")
-        raise HTTPException(status_code=400, detail="Username already exists")
-        logger.error(f"Registration failed: Email {user.email} already exists")
-        raise HTTPException(status_code=400, detail="Email already exists")
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await hash_password(user.password)
     user_doc = {
         "username": user.username,
         "password": hashed_password,
         "role": user.role,
         "email": user.email
     }
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        logger.error(f"Registration failed: Username {user.username} already exists")
+        raise HTTPException(status_code=400, detail="Username already exists")
+    invalidate_user(user.username)
     logger.info(f"User registered successfully: {user.username}")
     return {"message": "Registration successful", "username": user.username}
 
 async def login_user(request: LoginRequest):
     user = await db.users.find_one({"username": request.username})
-    if not user or not pwd_context.verify(request.password, user["password"]):
+    if not user or not await verify_password(request.password, user["password"]):
         logger.error(f"Login failed: {request.username}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    access_token = create_access_token(user["username"], UserRole(user["role"]).value)
     logger.info(f"Login successful: {request.username}")
-    return {"message": "Login successful"}
+    return {"message": "Login successful", "access_token": access_token, "token_type": "bearer", "role": user["role"]}
@@ -1,75 +1,73 @@
 from domain.models import Class, Student, TeacherAssignment, UserRole, ClassStatus
 from infrastructure.database import db
+from application.utils.versions import bump_version
+from application.utils.reference_cache import clear_references, get_reference, invalidate_reference
+from application.utils.validation import class_ref, subject_ref, require_references
+from application.utils.pagination import PageParams, paginate
+from application.services import enrollment_service
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from typing import Awaitable, Callable, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def create_class(class_: Class, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Class creation failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def create_class(class_: Class, user: dict):
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Class creation failed: User {username} not authorized")
+        logger.error(f"Class creation failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
-    if not await db.subjects.find_one({"subject_id": class_.subject_id}):
-        logger.error(f"Class creation failed: Subject {class_.subject_id} not found")
-        raise HTTPException(status_code=404, detail="Subject not found")
+    await require_references("Class creation", subject_ref(class_.subject_id))
     try:
         class_doc = class_.dict()
         class_doc["status"] = class_.status.value
         await db.classes.insert_one(class_doc)
+        invalidate_reference("classes", class_.class_id)
+        await bump_version("classes")
         logger.info(f"Class created: {class_.class_id}")
         return class_
+    except DuplicateKeyError:
+        logger.error(f"Class creation failed: Class ID {class_.class_id} already exists")
+        raise HTTPException(status_code=400, detail="Class ID already exists")
     except Exception as e:
         logger.error(f"Failed to create class {class_.class_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def get_class(class_id: str, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Class retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
-    class_ = await db.classes.find_one({"class_id": class_id})
+async def get_class(class_id: str, user: dict, version: int = 0):
+    class_ = await get_reference("classes", class_id, version)
     if not class_:
         logger.error(f"Class retrieval failed: Class {class_id} not found")
         raise HTTPException(status_code=404, detail="Class not found")
     logger.info(f"Class retrieved: {class_id}")
     return Class(**class_)
 
-async def update_class(class_id: str, class_: Class, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Class update failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def update_class(class_id: str, class_: Class, user: dict):
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Class update failed: User {username} not authorized")
+        logger.error(f"Class update failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
-    existing_class = await db.classes.find_one({"class_id": class_id})
-    if not existing_class:
-        logger.error(f"Class update failed: Class {class_id} not found")
-        raise HTTPException(status_code=404, detail="Class not found")
-    if not await db.subjects.find_one({"subject_id": class_.subject_id}):
-        logger.error(f"Class update failed: Subject {class_.subject_id} not found")
-        raise HTTPException(status_code=404, detail="Subject not found")
+    await require_references(
+        "Class update",
+        class_ref(class_id),
+        subject_ref(class_.subject_id)
+    )
     class_doc = class_.dict()
     class_doc["status"] = class_.status.value
     try:
         await db.classes.update_one({"class_id": class_id}, {"$set": class_doc})
+        invalidate_reference("classes", class_id, class_.class_id)
+        await bump_version("classes")
+        await enrollment_service.rename_enrollments("class_id", class_id, class_.class_id)
         logger.info(f"Class updated: {class_id}")
         return class_
+    except DuplicateKeyError:
+        logger.error(f"Class update failed: Class ID {class_.class_id} already exists")
+        raise HTTPException(status_code=400, detail="Class ID already exists")
     except Exception as e:
         logger.error(f"Failed to update class {class_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def delete_class(class_id: str, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Class deletion failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def delete_class(class_id: str, user: dict):
     if user["role"] != UserRole.admin:
-        logger.error(f"Class deletion failed: User {username} not authorized")
+        logger.error(f"Class deletion failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
     existing_class = await db.classes.find_one({"class_id": class_id})
     if not existing_class:
@@ -77,70 +75,122 @@ async def delete_class(class_id: str, username: str):
         raise HTTPException(status_code=404, detail="Class not found")
     try:
         await db.classes.delete_one({"class_id": class_id})
+        invalidate_reference("classes", class_id)
+        await bump_version("classes")
+        await enrollment_service.delete_enrollments("class_id", class_id)
         logger.info(f"Class deleted: {class_id}")
         return {"message": f"Class {class_id} deleted successfully"}
     except Exception as e:
         logger.error(f"Failed to delete class {class_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def list_classes(username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Classes retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def list_classes(user: dict, page: PageParams):
     try:
-        classes = await db.classes.find().to_list(length=None)
+        classes = await paginate(db.classes, page, key="class_id", model=Class)
         logger.info("Classes retrieved")
-        return [Class(**class_) for class_ in classes]
+        return classes
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to retrieve classes: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def get_class_students_and_teacher(class_id: str, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Class details retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
-    class_ = await db.classes.find_one({"class_id": class_id})
-    if not class_:
+def class_roster_pipeline(class_id: str) -> list:
+    """Aggregation returning one class with its teacher assignment and enrolled students."""
+    return [
+        {"$match": {"class_id": class_id}},
+        {"$lookup": {
+            "from": "teacher_assignments",
+            "let": {"class_id": "$class_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$class_id", "$$class_id"]}}},
+                {"$limit": 1},
+                {"$project": {"_id": 0}}
+            ],
+            "as": "teacher_assignment"
+        }},
+        # Walks the (class_id, student_id) enrollments index, then each student by its unique student_id
+        {"$lookup": {
+            "from": "enrollments",
+            "let": {"class_id": "$class_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$class_id", "$$class_id"]}}},
+                {"$lookup": {
+                    "from": "students",
+                    "let": {"student_id": "$student_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$student_id", "$$student_id"]}}},
+                        {"$project": {"_id": 0, "search": 0}}
+                    ],
+                    "as": "student"
+                }},
+                {"$unwind": "$student"},
+                {"$replaceRoot": {"newRoot": "$student"}},
+                {"$sort": {"last_name": 1, "first_name": 1}}
+            ],
+            "as": "students"
+        }},
+        {"$set": {"teacher_assignment": {"$arrayElemAt": ["$teacher_assignment", 0]}}},
+        {"$project": {"_id": 0}}
+    ]
+
+async def get_class_students_and_teacher(class_id: str, user: dict):
+    try:
+        result = await db.classes.aggregate(class_roster_pipeline(class_id)).to_list(length=1)
+    except Exception as e:
+        logger.error(f"Failed to retrieve details of class {class_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    if not result:
         logger.error(f"Class details retrieval failed: Class {class_id} not found")
         raise HTTPException(status_code=404, detail="Class not found")
-    teacher_assignment = await db.teacher_assignments.find_one({"class_id": class_id})
-    students = await db.students.find({"class_id": class_id}).to_list(length=None)
+    roster = result[0]
+    teacher_assignment = roster.pop("teacher_assignment", None)
+    students = roster.pop("students")
     logger.info(f"Class details retrieved: {class_id}")
     return {
-        "class": Class(**class_),
+        "class": Class(**roster),
         "teacher_assignment": TeacherAssignment(**teacher_assignment) if teacher_assignment else None,
         "students": [Student(**student) for student in students]
     }
 
-async def clean_classes():
-    """Clean up invalid or incomplete class documents in the classes collection."""
-    classes = await db.classes.find().to_list(length=None)
-    for class_ in classes:
-        class_id = class_.get("class_id")
-        if not class_id:
-            logger.warning(f"Skipping class document with missing class_id: {class_}")
-            continue
-        updates = {}
-        if "class_name" not in class_ or class_["class_name"] is None:
-            updates["class_name"] = f"Class {class_id}"
-        if "subject_id" not in class_ or class_["subject_id"] is None:
-            updates["subject_id"] = "SUB000"  # Default or placeholder subject_id
-        if "day" not in class_ or class_["day"] is None:
-            updates["day"] = "Unknown"
-        if "start_time" not in class_ or class_["start_time"] is None:
-            updates["start_time"] = "00:00"
-        if "end_time" not in class_ or class_["end_time"] is None:
-            updates["end_time"] = "00:00"
-        if "capacity" not in class_ or class_["capacity"] is None:
-            updates["capacity"] = 0
-        if "status" not in class_ or class_["status"] is None:
-            updates["status"] = ClassStatus.ongoing.value
-        
-        if updates:
-            await db.classes.update_one(
-                {"_id": class_["_id"]},
-                {"$set": updates}
+# Value written into each field that is missing or null; class_name is derived from the class_id
+CLASS_FIELD_DEFAULTS = {
+    "class_name": {"$concat": ["Class ", {"$toString": "$class_id"}]},
+    "subject_id": "SUB000",  # Default or placeholder subject_id
+    "day": "Unknown",
+    "start_time": "00:00",
+    "end_time": "00:00",
+    "capacity": 0,
+    "status": ClassStatus.ongoing.value,
+}
+
+async def clean_classes(progress: Optional[Callable[[str, int, int], Awaitable[None]]] = None) -> dict:
+    """Fill missing or null fields of class documents with defaults, one update_many per field.
+
+    Documents without a class_id are left untouched. Returns the number of documents modified per field.
+    progress, if given, is awaited with (stage, done, total) before each field and after the last one.
+    """
+    skipped = await db.classes.count_documents({"class_id": {"$in": [None, ""]}})
+    if skipped:
+        logger.warning(f"Skipping {skipped} class documents with missing class_id")
+    modified = {}
+    try:
+        for done, (field, default) in enumerate(CLASS_FIELD_DEFAULTS.items()):
+            if progress:
+                await progress("fields", done, len(CLASS_FIELD_DEFAULTS))
+            # A pipeline update so that expressions such as the class_name default are evaluated per document
+            result = await db.classes.update_many(
+                {field: None, "class_id": {"$nin": [None, ""]}},
+                [{"$set": {field: default}}]
             )
-            logger.info(f"Updated class {class_id} with fields: {updates}")
\ No newline at end of file
+            modified[field] = result.modified_count
+            if result.modified_count:
+                logger.info(f"Filled {field} on {result.modified_count} classes")
+        if progress:
+            await progress("fields", len(CLASS_FIELD_DEFAULTS), len(CLASS_FIELD_DEFAULTS))
+    finally:
+        # Also after a cancellation between fields, which keeps the fields already filled
+        clear_references("classes")
+        if any(modified.values()):
+            await bump_version("classes")
+    return modified
@@ -0,0 +1,80 @@
+from domain.models import Class, Enrollment, UserRole
+from infrastructure.database import db
+from application.utils.validation import class_ref, student_ref, require_references
+from application.utils.utils import get_today
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def enroll_in_class(class_id: str, student_id: str, user: dict) -> Enrollment:
+    if user["role"] not in [UserRole.admin, UserRole.teacher]:
+        logger.error(f"Class enrollment failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    await require_references("Class enrollment", class_ref(class_id), student_ref(student_id))
+    enrollment = Enrollment(student_id=student_id, class_id=class_id, enrollment_date=get_today())
+    enrollment_doc = enrollment.dict()
+    enrollment_doc["enrollment_date"] = enrollment.enrollment_date.isoformat()
+    try:
+        await db.enrollments.insert_one(enrollment_doc)
+    except DuplicateKeyError:
+        logger.error(f"Class enrollment failed: Student {student_id} already enrolled in class {class_id}")
+        raise HTTPException(status_code=400, detail="Student already enrolled in class")
+    except Exception as e:
+        logger.error(f"Failed to enroll student {student_id} in class {class_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    logger.info(f"Student {student_id} enrolled in class {class_id}")
+    return enrollment
+
+async def unenroll_from_class(class_id: str, student_id: str, user: dict):
+    if user["role"] not in [UserRole.admin, UserRole.teacher]:
+        logger.error(f"Class unenrollment failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        result = await db.enrollments.delete_one({"class_id": class_id, "student_id": student_id})
+    except Exception as e:
+        logger.error(f"Failed to unenroll student {student_id} from class {class_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    if not result.deleted_count:
+        logger.error(f"Class unenrollment failed: Student {student_id} not enrolled in class {class_id}")
+        raise HTTPException(status_code=404, detail="Enrollment not found")
+    logger.info(f"Student {student_id} unenrolled from class {class_id}")
+    return {"message": f"Student {student_id} unenrolled from class {class_id}"}
+
+async def get_student_classes(student_id: str, user: dict):
+    """Get the classes a student is enrolled in, walking the student_id side of the enrollments index."""
+    await require_references("Student classes retrieval", student_ref(student_id))
+    pipeline = [
+        {"$match": {"student_id": student_id}},
+        {"$lookup": {
+            "from": "classes",
+            "let": {"class_id": "$class_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$class_id", "$$class_id"]}}},
+                {"$project": {"_id": 0}}
+            ],
+            "as": "class"
+        }},
+        {"$unwind": "$class"},
+        {"$replaceRoot": {"newRoot": "$class"}},
+        {"$sort": {"class_id": 1}}
+    ]
+    try:
+        classes = await db.enrollments.aggregate(pipeline).to_list(length=None)
+    except Exception as e:
+        logger.error(f"Failed to retrieve classes of student {student_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    logger.info(f"Classes retrieved for student {student_id}")
+    return [Class(**class_) for class_ in classes]
+
+async def rename_enrollments(field: str, old_id: str, new_id: str):
+    """Keep enrollments pointing at a student or class whose ID was changed by an update."""
+    if old_id != new_id:
+        await db.enrollments.update_many({field: old_id}, {"$set": {field: new_id}})
+
+async def delete_enrollments(field: str, id_value: str):
+    """Remove the enrollments of a deleted student or class."""
+    result = await db.enrollments.delete_many({field: id_value})
+    if result.deleted_count:
+        logger.info(f"Removed {result.deleted_count} enrollments with {field} {id_value}")
@@ -0,0 +1,179 @@
+from domain.models import Student, Grade, UserRole, BulkRowError, BulkWriteSummary
+from infrastructure.database import db
+from application.utils.utils import insert_many_unordered
+from application.utils.search import search_keys
+from application.utils.versions import bump_version
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, ValidationError
+from typing import Iterator, Type
+import asyncio
+import csv
+import io
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+class ImportSummary:
+    """Accumulates per-row results of a CSV import."""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row: int, id_: str, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(BulkRowError(row=row, id=id_ or None, error=error))
+
+    def result(self) -> BulkWriteSummary:
+        self.errors.sort(key=lambda error: error.row)
+        return BulkWriteSummary(received=self.received, inserted=self.inserted, failed=self.failed, errors=self.errors)
+
+def iter_csv_rows(upload: UploadFile):
+    """Yield (row index, row dict) from an uploaded CSV with a header row, reading it incrementally.
+
+    The index counts data rows from 0 (see BulkRowError.row), so the header and quoted multi-line
+    cells do not shift it. Empty cells are dropped so that model defaults apply to them.
+    Reading the spooled upload blocks, so it is consumed from a worker thread (iter_validated_rows).
+    """
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    for index, row in enumerate(reader):
+        yield index, {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+def parse_rows(rows: Iterator, model: Type[BaseModel], size: int) -> list:
+    """Read and validate up to size rows; runs in a worker thread.
+
+    Returns (row index, row dict, model instance or None, error message or None) tuples.
+    """
+    parsed = []
+    for row, values in itertools.islice(rows, size):
+        try:
+            parsed.append((row, values, model(**values), None))
+        except ValidationError as e:
+            parsed.append((row, values, None, validation_message(e)))
+    return parsed
+
+async def iter_validated_rows(upload: UploadFile, model: Type[BaseModel]):
+    """Yield the parse_rows tuples of every data row of an uploaded CSV.
+
+    Reading, decoding, CSV parsing and validation run in a worker thread, IMPORT_BATCH_SIZE rows at
+    a time, so a large import does not stall other requests on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    rows = iter_csv_rows(upload)
+    while True:
+        parsed = await loop.run_in_executor(None, parse_rows, rows, model, IMPORT_BATCH_SIZE)
+        for item in parsed:
+            yield item
+        if len(parsed) < IMPORT_BATCH_SIZE:
+            return
+
+async def load_ids(collection, field: str) -> set:
+    """Load every value of an ID field once, so rows can be checked in memory."""
+    return {document[field] async for document in collection.find({}, projection={"_id": 0, field: 1}) if field in document}
+
+async def flush(collection, batch: list, summary: ImportSummary, id_field: str):
+    rows = [row for row, _ in batch]
+    documents = [document for _, document in batch]
+    inserted, failures = await insert_many_unordered(collection, documents)
+    summary.inserted += inserted
+    for position, message in failures:
+        summary.fail(rows[position], documents[position][id_field], message)
+    batch.clear()
+
+async def import_students(upload: UploadFile, user: dict) -> BulkWriteSummary:
+    if user["role"] not in [UserRole.admin, UserRole.teacher]:
+        logger.error(f"Student import failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    summary = ImportSummary()
+    batch = []
+    seen_ids = set()
+    seen_emails = set()
+    try:
+        async for row, values, student, error in iter_validated_rows(upload, Student):
+            summary.received += 1
+            if error:
+                summary.fail(row, values.get("student_id"), error)
+                continue
+            if student.student_id in seen_ids:
+                summary.fail(row, student.student_id, "Duplicate student ID in file")
+                continue
+            if student.email in seen_emails:
+                summary.fail(row, student.student_id, "Duplicate email in file")
+                continue
+            seen_ids.add(student.student_id)
+            seen_emails.add(student.email)
+            student_doc = student.dict()
+            student_doc["date_of_birth"] = student.date_of_birth.isoformat()
+            student_doc["enrollment_date"] = student.enrollment_date.isoformat()
+            student_doc["search"] = search_keys("students", student_doc)
+            batch.append((row, student_doc))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush(db.students, batch, summary, "student_id")
+        await flush(db.students, batch, summary, "student_id")
+    except (UnicodeDecodeError, csv.Error) as e:
+        logger.error(f"Student import failed: Unreadable CSV: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {str(e)}")
+    except Exception as e:
+        logger.error(f"Student import failed after {summary.received} rows: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        # Rows inserted before a failure are kept, so cached student lists are stale either way
+        if summary.inserted:
+            await bump_version("students")
+    logger.info(f"Students imported: {summary.inserted} inserted, {summary.failed} failed")
+    return summary.result()
+
+async def import_grades(upload: UploadFile, user: dict) -> BulkWriteSummary:
+    if user["role"] not in [UserRole.admin, UserRole.teacher]:
+        logger.error(f"Grade import failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    summary = ImportSummary()
+    batch = []
+    seen_ids = set()
+    try:
+        student_ids = await load_ids(db.students, "student_id")
+        class_ids = await load_ids(db.classes, "class_id")
+        subject_ids = await load_ids(db.subjects, "subject_id")
+        async for row, values, grade, error in iter_validated_rows(upload, Grade):
+            summary.received += 1
+            if error:
+                summary.fail(row, values.get("grade_id"), error)
+                continue
+            if grade.student_id not in student_ids:
+                summary.fail(row, grade.grade_id, "Student not found")
+                continue
+            if grade.class_id not in class_ids:
+                summary.fail(row, grade.grade_id, "Class not found")
+                continue
+            if grade.subject_id not in subject_ids:
+                summary.fail(row, grade.grade_id, "Subject not found")
+                continue
+            if grade.grade_id in seen_ids:
+                summary.fail(row, grade.grade_id, "Duplicate grade ID in file")
+                continue
+            seen_ids.add(grade.grade_id)
+            grade_doc = grade.dict()
+            grade_doc["date"] = grade.date.isoformat()
+            batch.append((row, grade_doc))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush(db.grades, batch, summary, "grade_id")
+        await flush(db.grades, batch, summary, "grade_id")
+    except (UnicodeDecodeError, csv.Error) as e:
+        logger.error(f"Grade import failed: Unreadable CSV: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {str(e)}")
+    except Exception as e:
+        logger.error(f"Grade import failed after {summary.received} rows: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    logger.info(f"Grades imported: {summary.inserted} inserted, {summary.failed} failed")
+    return summary.result()
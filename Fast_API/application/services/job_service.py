@@ -0,0 +1,193 @@
+from domain.models import Job, JobRequest, JobStatus, UserRole
+from infrastructure.database import db
+from application.utils.pagination import PageParams, paginate
+from application.services import class_service, payment_service, statistics_service
+from config.settings import JOB_CONCURRENCY, JOB_LEASE_SECONDS
+from fastapi import HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Owner recorded on the jobs this process runs; unique per process, including sibling workers on one host
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Jobs started by this process; job state itself lives in the jobs collection
+running_jobs: Dict[str, asyncio.Task] = {}
+job_slots = asyncio.Semaphore(JOB_CONCURRENCY)
+heartbeat_task: Optional[asyncio.Task] = None
+
+async def clean_payments_job(params: dict, progress) -> dict:
+    return await payment_service.clean_payments(dry_run=bool(params.get("dry_run", False)), progress=progress)
+
+async def clean_classes_job(params: dict, progress) -> dict:
+    return {"modified": await class_service.clean_classes(progress=progress)}
+
+async def rebuild_income_rollups_job(params: dict, progress) -> dict:
+    return await statistics_service.rebuild_income_rollups(progress=progress)
+
+# Job type -> handler awaited with (params, progress) and returning the job result
+JOB_HANDLERS = {
+    "clean-payments": clean_payments_job,
+    "clean-classes": clean_classes_job,
+    "rebuild-income-rollups": rebuild_income_rollups_job,
+}
+
+FINISHED_STATUSES = [JobStatus.succeeded.value, JobStatus.failed.value, JobStatus.cancelled.value]
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def lease_deadline() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)
+
+def lease_expired() -> dict:
+    """Filter for jobs whose owner stopped renewing their lease; jobs without one predate leases."""
+    return {"$or": [{"lease_expires_at": {"$lt": datetime.now(timezone.utc)}}, {"lease_expires_at": None}]}
+
+async def set_job_fields(job_id: str, fields: dict):
+    await db.jobs.update_one({"job_id": job_id}, {"$set": fields})
+
+async def check_cancel_requested(job_id: str):
+    """Stop the current job if another process recorded a cancel request for it."""
+    job = await db.jobs.find_one({"job_id": job_id}, projection={"cancel_requested": 1})
+    if job and job.get("cancel_requested"):
+        raise asyncio.CancelledError()
+
+async def run_job(job_id: str, job_type: str, params: dict):
+    async def progress(stage: str, done: int, total: int):
+        await set_job_fields(job_id, {"progress": {"stage": stage, "done": done, "total": total}})
+        await check_cancel_requested(job_id)
+
+    try:
+        async with job_slots:
+            await check_cancel_requested(job_id)
+            await set_job_fields(job_id, {"status": JobStatus.running.value, "started_at": now()})
+            logger.info(f"Job started: {job_id} ({job_type})")
+            result = await JOB_HANDLERS[job_type](params, progress)
+        await set_job_fields(job_id, {"status": JobStatus.succeeded.value, "finished_at": now(), "result": result})
+        logger.info(f"Job succeeded: {job_id} ({job_type})")
+    except asyncio.CancelledError:
+        await set_job_fields(job_id, {"status": JobStatus.cancelled.value, "finished_at": now()})
+        logger.info(f"Job cancelled: {job_id} ({job_type})")
+        raise
+    except Exception as e:
+        logger.error(f"Job failed: {job_id} ({job_type}): {str(e)}", exc_info=True)
+        await set_job_fields(job_id, {"status": JobStatus.failed.value, "finished_at": now(), "error": str(e)})
+
+async def submit_job(request: JobRequest, user: dict) -> Job:
+    if user["role"] != UserRole.admin:
+        logger.error(f"Job submission failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if request.type not in JOB_HANDLERS:
+        logger.error(f"Job submission failed: Unknown job type {request.type}")
+        raise HTTPException(status_code=400, detail=f"Unknown job type: {request.type}")
+    job = Job(
+        job_id=uuid.uuid4().hex,
+        type=request.type,
+        params=request.params,
+        status=JobStatus.queued,
+        submitted_by=user["username"],
+        owner=OWNER_ID,
+        lease_expires_at=lease_deadline(),
+        created_at=now()
+    )
+    try:
+        await db.jobs.insert_one(job.dict())
+    except Exception as e:
+        logger.error(f"Job submission failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    task = asyncio.create_task(run_job(job.job_id, job.type, job.params))
+    running_jobs[job.job_id] = task
+    task.add_done_callback(lambda _: running_jobs.pop(job.job_id, None))
+    logger.info(f"Job queued: {job.job_id} ({job.type}) by {user['username']}")
+    return job
+
+async def get_job(job_id: str, user: dict) -> Job:
+    if user["role"] != UserRole.admin:
+        logger.error(f"Job retrieval failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    job = await db.jobs.find_one({"job_id": job_id})
+    if not job:
+        logger.error(f"Job retrieval failed: Job {job_id} not found")
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Job(**job)
+
+async def list_jobs(user: dict, page: PageParams):
+    if user["role"] != UserRole.admin:
+        logger.error(f"Job listing failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        jobs = await paginate(db.jobs, page, key="job_id", model=Job, sort_fields=("created_at",))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to retrieve jobs: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    logger.info("Jobs retrieved")
+    return jobs
+
+async def cancel_job(job_id: str, user: dict) -> Job:
+    if user["role"] != UserRole.admin:
+        logger.error(f"Job cancellation failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    job = await db.jobs.find_one({"job_id": job_id})
+    if not job:
+        logger.error(f"Job cancellation failed: Job {job_id} not found")
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in FINISHED_STATUSES:
+        logger.error(f"Job cancellation failed: Job {job_id} already {job['status']}")
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    task = running_jobs.get(job_id)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    else:
+        # Owner stopped: nothing will run the job any more, so cancel it here
+        result = await db.jobs.update_one(
+            {"job_id": job_id, "status": {"$nin": FINISHED_STATUSES}, **lease_expired()},
+            {"$set": {"status": JobStatus.cancelled.value, "finished_at": now()}}
+        )
+        if not result.modified_count:
+            # Run by another live process: it stops the job at its next progress report and marks it cancelled
+            await set_job_fields(job_id, {"cancel_requested": True})
+    logger.info(f"Job cancellation requested: {job_id} by {user['username']}")
+    return Job(**await db.jobs.find_one({"job_id": job_id}))
+
+async def fail_interrupted_jobs():
+    """Mark queued or running jobs whose owner process stopped (their lease expired) as failed.
+
+    Jobs of live processes keep renewing their lease and are left alone.
+    """
+    result = await db.jobs.update_many(
+        {"status": {"$in": [JobStatus.queued.value, JobStatus.running.value]}, **lease_expired()},
+        {"$set": {"status": JobStatus.failed.value, "finished_at": now(), "error": "Interrupted by server restart"}}
+    )
+    if result.modified_count:
+        logger.warning(f"Marked {result.modified_count} interrupted jobs as failed")
+
+async def renew_job_leases():
+    """Heartbeat: extend the leases of this process's unfinished jobs and fail those of stopped processes."""
+    while True:
+        try:
+            await db.jobs.update_many(
+                {"owner": OWNER_ID, "status": {"$nin": FINISHED_STATUSES}},
+                {"$set": {"lease_expires_at": lease_deadline()}}
+            )
+            await fail_interrupted_jobs()
+        except Exception as e:
+            logger.error(f"Job lease renewal failed: {str(e)}", exc_info=True)
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+
+def start_job_heartbeat():
+    global heartbeat_task
+    if heartbeat_task is None:
+        heartbeat_task = asyncio.create_task(renew_job_leases())
@@ -1,62 +1,58 @@
 from domain.models import Payment, UserRole, PaymentStatus
 from infrastructure.database import db
+from infrastructure.counters import SequenceAllocator, reserve_sequence, seed_sequence
+from application.utils.pagination import PageParams, paginate
+from application.utils.validation import Reference, class_ref, student_ref, require_references
+from application.utils.export import ExportParams, export_response
+from application.services import statistics_service
+from config.settings import PAYMENT_ID_BLOCK_SIZE
 from fastapi import HTTPException
+from pymongo import UpdateOne
+from typing import Awaitable, Callable, Optional
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+PAYMENT_ID_COUNTER = "payment_id"
+payment_ids = SequenceAllocator(PAYMENT_ID_COUNTER, block_size=PAYMENT_ID_BLOCK_SIZE)
+PAYMENT_ID_PATTERN = re.compile(r"PAY(\d+)")
+CLEAN_BATCH_SIZE = 1000
+MAX_REPORTED_CHANGES = 1000
+
 async def generate_payment_id():
-    """Generate a unique payment_id in the format PAYXXX."""
+    """Generate a unique payment_id in the format PAYXXX from the payment_id counter."""
     try:
-        max_attempts = 10
-        for _ in range(max_attempts):
-            # Find the latest payment with a valid PAYXXX format
-            latest_payment = await db.payments.find_one(
-                {"payment_id": {"$regex": "^PAY\\d+$", "$exists": True, "$ne": None}},
-                sort=[("payment_id", -1)]
-            )
-            
-            if not latest_payment or not latest_payment.get("payment_id"):
-                new_payment_id = "PAY001"
-            else:
-                latest_id = latest_payment["payment_id"]
-                match = re.match(r"PAY(\d+)", latest_id)
-                if not match:
-                    logger.error(f"Unexpected invalid payment_id format: {latest_id}")
-                    new_payment_id = "PAY001"
-                else:
-                    numeric_part = int(match.group(1)) + 1
-                    new_payment_id = f"PAY{numeric_part:03d}"
-            
-            # Check if the generated payment_id already exists
-            if not await db.payments.find_one({"payment_id": new_payment_id}):
-                logger.debug(f"Generated unique payment_id: {new_payment_id}")
-                return new_payment_id
-            logger.warning(f"Generated payment_id {new_payment_id} already exists, retrying...")
-        
-        logger.error("Failed to generate unique payment_id after multiple attempts")
-        raise HTTPException(status_code=500, detail="Unable to generate unique payment ID")
-    
+        new_payment_id = f"PAY{await payment_ids.next():03d}"
+        logger.debug(f"Generated unique payment_id: {new_payment_id}")
+        return new_payment_id
     except Exception as e:
         logger.error(f"Failed to generate payment_id: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to generate payment ID: {str(e)}")
 
-async def process_payment(payment: Payment, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Payment processing failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def seed_payment_counter():
+    """Migration: seed the payment_id counter from the highest numeric PAYXXX id already stored."""
+    pipeline = [
+        {"$match": {"payment_id": {"$regex": "^PAY\\d+$"}}},
+        {"$group": {"_id": None, "max_id": {"$max": {"$toLong": {"$substrCP": [
+            "$payment_id", 3, {"$subtract": [{"$strLenCP": "$payment_id"}, 3]}
+        ]}}}}}
+    ]
+    result = await db.payments.aggregate(pipeline).to_list(length=1)
+    max_id = result[0]["max_id"] if result else 0
+    await seed_sequence(PAYMENT_ID_COUNTER, max_id)
+    logger.info(f"Payment ID counter seeded from existing payments: {max_id}")
+
+async def process_payment(payment: Payment, user: dict):
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Payment processing failed: User {username} not authorized")
+        logger.error(f"Payment processing failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    if not await db.students.find_one({"student_id": payment.student_id}):
-        logger.error(f"Payment processing failed: Student {payment.student_id} not found")
-        raise HTTPException(status_code=404, detail="Student not found")
-    if not await db.classes.find_one({"class_id": payment.class_id}):
-        logger.error(f"Payment processing failed: Class {payment.class_id} not found")
-        raise HTTPException(status_code=404, detail="Class not found")
+    await require_references(
+        "Payment processing",
+        student_ref(payment.student_id),
+        class_ref(payment.class_id)
+    )
     
     payment_id = None
     try:
@@ -66,6 +62,7 @@ async def process_payment(payment: Payment, username: str):
         payment_doc["payment_date"] = payment.payment_date.isoformat()
         
         await db.payments.insert_one(payment_doc)
+        await statistics_service.record_income(payment_doc)
         payment.payment_id = payment_id
         logger.info(f"Payment processed: {payment_id}")
         return payment
@@ -74,87 +71,159 @@ async def process_payment(payment: Payment, username: str):
         logger.error(f"Failed to process payment {payment_id or 'unknown'}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def get_all_payments(username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Payments retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def get_all_payments(user: dict, page: PageParams):
     try:
-        payments = await db.payments.find().to_list(length=None)
+        payments = await paginate(db.payments, page, key="payment_id", model=Payment, sort_fields=("payment_date",))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to retrieve payments: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info("Payments retrieved")
-    return [Payment(**payment) for payment in payments]
+    return payments
+
+async def get_student_payments(
+    student_id: str,
+    user: dict,
+    page: PageParams,
+    month: Optional[str] = None,
+    year: Optional[str] = None,
+    status: Optional[PaymentStatus] = None
+):
+    """Get one student's payments; without a sort parameter they come newest first."""
+    await require_references("Student payments retrieval", student_ref(student_id))
+    query = {"student_id": student_id}
+    if month:
+        query["month"] = month
+    if year:
+        query["year"] = year
+    if status:
+        query["status"] = status.value
+    if not page.sort:
+        page.sort = "payment_date"
+        page.order = "desc"
+    try:
+        payments = await paginate(db.payments, page, key="payment_id", model=Payment, sort_fields=("payment_date",), query=query)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to retrieve payments of student {student_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    logger.info(f"Payments retrieved for student {student_id}")
+    return payments
 
-async def update_payment(payment_id: str, payment: Payment, username: str):
+async def export_payments(user: dict, params: ExportParams):
+    query = params.query("payment_date")
+    logger.info(f"Payments export started by {user['username']}: {query}")
+    return export_response(db.payments, query, params, sort_field="payment_date", filename="payments")
+
+async def update_payment(payment_id: str, payment: Payment, user: dict):
     if not payment_id or not isinstance(payment_id, str):
         logger.error(f"Invalid payment_id: {payment_id}")
         raise HTTPException(status_code=400, detail="Invalid payment ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Payment update failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Payment update failed: User {username} not authorized")
+        logger.error(f"Payment update failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
-    existing_payment = await db.payments.find_one({"payment_id": payment_id})
-    if not existing_payment:
-        logger.error(f"Payment update failed: Payment {payment_id} not found")
-        raise HTTPException(status_code=404, detail="Payment not found")
-    if not await db.students.find_one({"student_id": payment.student_id}):
-        logger.error(f"Payment update failed: Student {payment.student_id} not found")
-        raise HTTPException(status_code=404, detail="Student not found")
-    if not await db.classes.find_one({"class_id": payment.class_id}):
-        logger.error(f"Payment update failed: Class {payment.class_id} not found")
-        raise HTTPException(status_code=404, detail="Class not found")
+    await require_references(
+        "Payment update",
+        Reference("payments", "payment_id", payment_id, "Payment"),
+        student_ref(payment.student_id),
+        class_ref(payment.class_id)
+    )
     payment_doc = payment.dict()
     payment_doc["payment_date"] = payment.payment_date.isoformat()
     try:
-        await db.payments.update_one({"payment_id": payment_id}, {"$set": payment_doc})
+        previous_payment = await db.payments.find_one_and_update({"payment_id": payment_id}, {"$set": payment_doc})
+        if previous_payment:
+            await statistics_service.record_income(previous_payment, sign=-1)
+            await statistics_service.record_income(payment_doc)
     except Exception as e:
         logger.error(f"Failed to update payment {payment_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Payment updated: {payment_id}")
     return payment
 
-async def delete_payment(payment_id: str, username: str):
+async def delete_payment(payment_id: str, user: dict):
     if not payment_id or not isinstance(payment_id, str):
         logger.error(f"Invalid payment_id: {payment_id}")
         raise HTTPException(status_code=400, detail="Invalid payment ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Payment deletion failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] != UserRole.admin:
-        logger.error(f"Payment deletion failed: User {username} not authorized")
+        logger.error(f"Payment deletion failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
     existing_payment = await db.payments.find_one({"payment_id": payment_id})
     if not existing_payment:
         logger.error(f"Payment deletion failed: Payment {payment_id} not found")
         raise HTTPException(status_code=404, detail="Payment not found")
     try:
-        await db.payments.delete_one({"payment_id": payment_id})
+        deleted_payment = await db.payments.find_one_and_delete({"payment_id": payment_id})
+        if deleted_payment:
+            await statistics_service.record_income(deleted_payment, sign=-1)
     except Exception as e:
         logger.error(f"Failed to delete payment {payment_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Payment deleted: {payment_id}")
     return {"message": f"Payment {payment_id} deleted successfully"}
 
-async def clean_payments():
-    """Clean up invalid payment_id values in the payments collection."""
-    payments = await db.payments.find().to_list(length=None)
+async def clean_payments(dry_run: bool = False, progress: Optional[Callable[[str, int, int], Awaitable[None]]] = None) -> dict:
+    """Reassign invalid or duplicate payment_id values in one pass over the payments collection.
+
+    The first document (in _id order) holding a valid PAYXXX id keeps it; every other document gets
+    a fresh id above both the highest existing id and the payment_id counter, so reassigned ids
+    never collide with ids handed out concurrently by generate_payment_id. With dry_run nothing is
+    written and the planned changes are returned instead. progress, if given, is awaited with
+    (stage, done, total) after each scanned or written batch.
+    """
+    total = await db.payments.estimated_document_count()
     seen_ids = set()
-    for i, payment in enumerate(payments, 1):
+    to_fix = []
+    max_id = 0
+    scanned = 0
+    cursor = db.payments.find({}, projection={"payment_id": 1}).sort("_id", 1).batch_size(CLEAN_BATCH_SIZE)
+    async for payment in cursor:
         payment_id = payment.get("payment_id")
-        if not payment_id or not isinstance(payment_id, str) or not re.match(r"PAY\d+", payment_id) or payment_id in seen_ids:
-            new_id = f"PAY{i:03d}"
-            while await db.payments.find_one({"payment_id": new_id}) or new_id in seen_ids:
-                i += 1
-                new_id = f"PAY{i:03d}"
-            await db.payments.update_one(
-                {"_id": payment["_id"]},
-                {"$set": {"payment_id": new_id}}
-            )
-            logger.info(f"Updated payment_id to {new_id} for document {payment['_id']}")
-        seen_ids.add(payment_id or new_id)
\ No newline at end of file
+        match = PAYMENT_ID_PATTERN.fullmatch(payment_id) if isinstance(payment_id, str) else None
+        if match and payment_id not in seen_ids:
+            seen_ids.add(payment_id)
+            max_id = max(max_id, int(match.group(1)))
+        else:
+            to_fix.append((payment["_id"], payment_id))
+        scanned += 1
+        if progress and scanned % CLEAN_BATCH_SIZE == 0:
+            await progress("scan", scanned, total)
+    if progress:
+        await progress("scan", scanned, scanned)
+    logger.info(f"Payment cleanup scanned {scanned} payments: {len(to_fix)} need a new payment_id")
+
+    if dry_run:
+        counter = await db.counters.find_one({"_id": PAYMENT_ID_COUNTER})
+        first_id = max(max_id, counter["seq"] if counter else 0) + 1
+    elif to_fix:
+        await seed_sequence(PAYMENT_ID_COUNTER, max_id)
+        first_id = await reserve_sequence(PAYMENT_ID_COUNTER, len(to_fix)) - len(to_fix) + 1
+    else:
+        first_id = max_id + 1
+    changes = [(_id, old_id, f"PAY{number:03d}") for number, (_id, old_id) in enumerate(to_fix, first_id)]
+
+    result = {"scanned": scanned, "to_fix": len(changes), "dry_run": dry_run}
+    if dry_run:
+        result["changes"] = [
+            {"_id": str(_id), "from": old_id, "to": new_id}
+            for _id, old_id, new_id in changes[:MAX_REPORTED_CHANGES]
+        ]
+        return result
+
+    modified = 0
+    for start in range(0, len(changes), CLEAN_BATCH_SIZE):
+        batch = changes[start:start + CLEAN_BATCH_SIZE]
+        # Matching on the old value as well skips documents changed since the scan
+        outcome = await db.payments.bulk_write(
+            [UpdateOne({"_id": _id, "payment_id": old_id}, {"$set": {"payment_id": new_id}}) for _id, old_id, new_id in batch],
+            ordered=False
+        )
+        modified += outcome.modified_count
+        logger.info(f"Payment cleanup: {start + len(batch)}/{len(changes)} reassignments written")
+        if progress:
+            await progress("write", start + len(batch), len(changes))
+    result["modified"] = modified
+    logger.info(f"Payment cleanup finished: {modified} of {len(changes)} payment_ids reassigned")
+    return result
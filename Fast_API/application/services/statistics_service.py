@@ -1,100 +1,193 @@
-from domain.models import Attendance, TeacherAssignment, UserRole, PaymentStatus, ClassStatus, EntityCounts, TodayIncome, TodayClass, TodayClassesResponse
+from domain.models import (
+    UserRole, PaymentStatus, ClassStatus, EntityCounts, TodayIncome, TodayClass, TodayClassesResponse,
+    IncomeGranularity, IncomePoint, IncomeSeries
+)
 from infrastructure.database import db
 from fastapi import HTTPException
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Optional
+import asyncio
 import logging
-from application.utils.utils import get_today, serialize_object_ids
+from application.utils.utils import get_today
+from application.utils.cache import TTLCache
+from config.settings import COUNTS_CACHE_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
 
-async def get_entity_counts(username: str) -> EntityCounts:
+COUNTED_COLLECTIONS = (
+    "students", "teachers", "subjects", "classes", "enrollments", "teacher_assignments", "payments", "attendance", "grades"
+)
+COUNTS_CACHE_KEY = "counts"
+counts_cache = TTLCache("entity_counts", max_size=1, ttl_seconds=COUNTS_CACHE_TTL_SECONDS)
+MAX_INCOME_RANGE_DAYS = 3660
+
+async def get_entity_counts(user: dict) -> EntityCounts:
     """Get counts of all entities (students, teachers, subjects, classes, etc.)"""
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Counts retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Counts retrieval failed: User {username} not authorized")
+        logger.error(f"Counts retrieval failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    counts = counts_cache.get(COUNTS_CACHE_KEY)
+    if counts is not None:
+        return counts
     try:
-        counts = {
-            "students": await db.students.count_documents({}),
-            "teachers": await db.teachers.count_documents({}),
-            "subjects": await db.subjects.count_documents({}),
-            "classes": await db.classes.count_documents({}),
-            "teacher_assignments": await db.teacher_assignments.count_documents({}),
-            "payments": await db.payments.count_documents({}),
-            "attendance": await db.attendance.count_documents({}),
-            "grades": await db.grades.count_documents({})
-        }
+        # Metadata-based counts, issued concurrently: one round trip's latency for all collections
+        totals = await asyncio.gather(*(db[collection].estimated_document_count() for collection in COUNTED_COLLECTIONS))
+        counts = EntityCounts(**dict(zip(COUNTED_COLLECTIONS, totals)))
+        counts_cache.set(COUNTS_CACHE_KEY, counts)
         logger.info("Entity counts retrieved")
-        return EntityCounts(**counts)
+        return counts
     except Exception as e:
         logger.error(f"Counts retrieval error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-async def get_today_income(username: str) -> TodayIncome:
+async def get_today_income(user: dict) -> TodayIncome:
     """Get total income from payments made today"""
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Today income retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] not in [UserRole.admin, UserRole.teacher]:
-        logger.error(f"Today income retrieval failed: User {username} not authorized")
+        logger.error(f"Today income retrieval failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
 
     today = get_today()
     try:
-        payments = await db.payments.find({"payment_date": today, "status": PaymentStatus.paid}).to_list(length=None)
-        total_income = sum(payment["amount"] for payment in payments)
+        rollup = await db.income_daily.find_one({"_id": today})
+        total_income = rollup["income"] if rollup else 0.0
         logger.info(f"Today's income retrieved: {total_income}")
         return TodayIncome(today_income=total_income, date=today)
     except Exception as e:
         logger.error(f"Today income retrieval error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
+async def record_income(payment: dict, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) a stored payment document's amount from its daily income rollup."""
+    if payment.get("status") != PaymentStatus.paid.value or not payment.get("payment_date"):
+        return
+    try:
+        await db.income_daily.update_one(
+            {"_id": payment["payment_date"]},
+            {"$inc": {"income": sign * payment["amount"], "payments": sign}},
+            upsert=True
+        )
+    except Exception as e:
+        # The payment itself is already written; a rebuild brings the rollups back in line
+        logger.error(f"Failed to update income rollup for {payment['payment_date']}: {str(e)}", exc_info=True)
+
+async def rebuild_income_rollups(progress: Optional[Callable[[str, int, int], Awaitable[None]]] = None):
+    """Recompute the daily income rollups from the payments collection.
+
+    progress, if given, is awaited with (stage, done, total) before and after the $out aggregation.
+    """
+    if progress:
+        await progress("aggregate", 0, 1)
+    pipeline = [
+        {"$match": {"status": PaymentStatus.paid.value, "payment_date": {"$type": "string"}}},
+        {"$group": {"_id": "$payment_date", "income": {"$sum": "$amount"}, "payments": {"$sum": 1}}},
+        {"$out": "income_daily"}
+    ]
+    await db.payments.aggregate(pipeline).to_list(length=None)
+    days = await db.income_daily.estimated_document_count()
+    if progress:
+        await progress("aggregate", 1, 1)
+    logger.info(f"Income rollups rebuilt: {days} days")
+    return {"days": days}
+
+async def ensure_income_rollups():
+    """Migration: build the rollups once if payments exist but no rollup has been written yet."""
+    if not await db.income_daily.find_one({}, projection={"_id": 1}) and await db.payments.find_one({}, projection={"_id": 1}):
+        await rebuild_income_rollups()
+
+def income_period(day: date, granularity: IncomeGranularity) -> str:
+    if granularity == IncomeGranularity.week:
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if granularity == IncomeGranularity.month:
+        return day.strftime("%Y-%m")
+    return day.isoformat()
+
+async def get_income_series(date_from: date, date_to: date, granularity: IncomeGranularity, user: dict) -> IncomeSeries:
+    """Get paid income per day, week (starting Monday) or month between two dates, inclusive"""
+    if user["role"] not in [UserRole.admin, UserRole.teacher]:
+        logger.error(f"Income series retrieval failed: User {user['username']} not authorized")
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if date_from > date_to:
+        logger.error(f"Income series retrieval failed: Invalid range {date_from} to {date_to}")
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (date_to - date_from).days > MAX_INCOME_RANGE_DAYS:
+        logger.error(f"Income series retrieval failed: Range {date_from} to {date_to} too large")
+        raise HTTPException(status_code=400, detail=f"Range must not exceed {MAX_INCOME_RANGE_DAYS} days")
+
+    try:
+        rollups = await db.income_daily.find(
+            {"_id": {"$gte": date_from.isoformat(), "$lte": date_to.isoformat()}}
+        ).to_list(length=None)
+    except Exception as e:
+        logger.error(f"Income series retrieval error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+    # Every period in the range is reported, including the ones without payments
+    points = {}
+    day = date_from
+    while day <= date_to:
+        points.setdefault(income_period(day, granularity), IncomePoint(period=income_period(day, granularity), income=0.0, payments=0))
+        day += timedelta(days=1)
+    for rollup in rollups:
+        point = points[income_period(date.fromisoformat(rollup["_id"]), granularity)]
+        point.income += rollup["income"]
+        point.payments += rollup["payments"]
+    logger.info(f"Income series retrieved: {date_from} to {date_to} by {granularity.value}")
+    return IncomeSeries(
+        granularity=granularity,
+        date_from=date_from.isoformat(),
+        date_to=date_to.isoformat(),
+        points=list(points.values())
+    )
+
+def today_classes_pipeline(day: str, today_date: str) -> list:
+    """Aggregation returning the day's ongoing classes with today's attendance and their teacher assignment."""
+    return [
+        # Required fields are validated here so incomplete documents never leave the server
+        {"$match": {
+            "day": day,
+            "status": ClassStatus.ongoing.value,
+            "class_id": {"$ne": None},
+            "class_name": {"$ne": None},
+            "subject_id": {"$ne": None}
+        }},
+        {"$lookup": {
+            "from": "attendance",
+            "let": {"class_id": "$class_id"},
+            "pipeline": [
+                {"$match": {"date": today_date, "$expr": {"$eq": ["$class_id", "$$class_id"]}}},
+                {"$project": {"_id": 0}}
+            ],
+            "as": "attendance"
+        }},
+        {"$lookup": {
+            "from": "teacher_assignments",
+            "let": {"class_id": "$class_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$class_id", "$$class_id"]}}},
+                {"$limit": 1},
+                {"$project": {"_id": 0}}
+            ],
+            "as": "teacher_assignment"
+        }},
+        {"$set": {"teacher_assignment": {"$arrayElemAt": ["$teacher_assignment", 0]}}},
+        {"$project": {"_id": 0}}
+    ]
+
 async def get_today_classes(day: str) -> TodayClassesResponse:
     """Get all classes scheduled for a specified day with their records"""
     try:
-        classes = await db.classes.find({"day": day, "status": ClassStatus.ongoing}).to_list(length=None)
-        today_classes = []
         today_date = get_today()
+        classes = await db.classes.aggregate(today_classes_pipeline(day, today_date)).to_list(length=None)
+        today_classes = []
         for class_ in classes:
-            # Validate required fields
-            required_fields = ["class_id", "class_name", "subject_id", "day", "status"]
-            missing_fields = [field for field in required_fields if field not in class_ or class_[field] is None]
-            if missing_fields:
-                logger.warning(f"Skipping class document with missing fields: {missing_fields}, document: {class_}")
-                continue
-            
-            # Fetch attendance for each class (for today)
-            attendance = await db.attendance.find({"class_id": class_["class_id"], "date": today_date}).to_list(length=None)
-            # Fetch teacher assignment for each class
-            teacher_assignment = await db.teacher_assignments.find_one({"class_id": class_["class_id"]})
-            # Create TodayClass instance with optional fields
             try:
-                today_class = TodayClass(
-                    class_id=class_["class_id"],
-                    class_name=class_["class_name"],
-                    subject_id=class_["subject_id"],
-                    day=class_["day"],
-                    start_time=class_.get("start_time"),
-                    end_time=class_.get("end_time"),
-                    room_number=class_.get("room_number"),
-                    capacity=class_.get("capacity"),
-                    status=ClassStatus(class_["status"]),
-                    attendance=[Attendance(**att) for att in attendance],
-                    teacher_assignment=TeacherAssignment(**teacher_assignment) if teacher_assignment else None
-                )
-                today_classes.append(today_class)
+                today_classes.append(TodayClass(**class_))
             except Exception as e:
-                logger.error(f"Failed to create TodayClass for document {class_['_id']}: {str(e)}")
+                logger.error(f"Failed to create TodayClass for class {class_['class_id']}: {str(e)}")
                 continue
-        
-        # Serialize ObjectIds in the response
-        serialized_classes = serialize_object_ids([class_.dict() for class_ in today_classes])
         logger.info(f"Classes retrieved for day {day}: {len(today_classes)} classes")
-        return TodayClassesResponse(today_classes=serialized_classes, date=today_date)
+        return TodayClassesResponse(today_classes=today_classes, date=today_date)
     except Exception as e:
         logger.error(f"Classes retrieval error for day {day}: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
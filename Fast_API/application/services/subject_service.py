@@ -1,55 +1,49 @@
 from domain.models import Subject, UserRole
 from infrastructure.database import db
+from application.utils.versions import bump_version
+from application.utils.reference_cache import get_reference, invalidate_reference
+from application.utils.pagination import PageParams, paginate
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def add_subject(subject: Subject, username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Subject addition failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def add_subject(subject: Subject, user: dict):
     if user["role"] not in [UserRole.admin]:
-        logger.error(f"Subject addition failed: User {username} not authorized")
+        logger.error(f"Subject addition failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
-    if await db.subjects.find_one({"subject_id": subject.subject_id}):
-        logger.error(f"Subject addition failed: Subject ID {subject.subject_id} already exists")
-        raise HTTPException(status_code=400, detail="Subject ID already exists")
     subject_doc = subject.dict()
     try:
         await db.subjects.insert_one(subject_doc)
+        invalidate_reference("subjects", subject.subject_id)
+        await bump_version("subjects")
+    except DuplicateKeyError:
+        logger.error(f"Subject addition failed: Subject ID {subject.subject_id} already exists")
+        raise HTTPException(status_code=400, detail="Subject ID already exists")
     except Exception as e:
         logger.error(f"Failed to add subject {subject.subject_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Subject added: {subject.subject_id}")
     return subject
 
-async def get_subject(subject_id: str, username: str):
+async def get_subject(subject_id: str, user: dict, version: int = 0):
     if not subject_id or not isinstance(subject_id, str):
         logger.error(f"Invalid subject_id: {subject_id}")
         raise HTTPException(status_code=400, detail="Invalid subject ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Subject retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
-    subject = await db.subjects.find_one({"subject_id": subject_id})
+    subject = await get_reference("subjects", subject_id, version)
     if not subject:
         logger.error(f"Subject retrieval failed: Subject {subject_id} not found")
         raise HTTPException(status_code=404, detail="Subject not found")
     logger.info(f"Subject retrieved: {subject_id}")
-    return subject
+    return Subject(**subject)
 
-async def update_subject(subject_id: str, subject: Subject, username: str):
+async def update_subject(subject_id: str, subject: Subject, user: dict):
     if not subject_id or not isinstance(subject_id, str):
         logger.error(f"Invalid subject_id: {subject_id}")
         raise HTTPException(status_code=400, detail="Invalid subject ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Subject update failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] not in [UserRole.admin]:
-        logger.error(f"Subject update failed: User {username} not authorized")
+        logger.error(f"Subject update failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
     existing_subject = await db.subjects.find_one({"subject_id": subject_id})
     if not existing_subject:
@@ -58,22 +52,23 @@ async def update_subject(subject_id: str, subject: Subject, username: str):
     subject_doc = subject.dict()
     try:
         await db.subjects.update_one({"subject_id": subject_id}, {"$set": subject_doc})
+        invalidate_reference("subjects", subject_id, subject.subject_id)
+        await bump_version("subjects")
+    except DuplicateKeyError:
+        logger.error(f"Subject update failed: Subject ID {subject.subject_id} already exists")
+        raise HTTPException(status_code=400, detail="Subject ID already exists")
     except Exception as e:
         logger.error(f"Failed to update subject {subject_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Subject updated: {subject_id}")
     return subject
 
-async def delete_subject(subject_id: str, username: str):
+async def delete_subject(subject_id: str, user: dict):
     if not subject_id or not isinstance(subject_id, str):
         logger.error(f"Invalid subject_id: {subject_id}")
         raise HTTPException(status_code=400, detail="Invalid subject ID")
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Subject deletion failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
     if user["role"] != UserRole.admin:
-        logger.error(f"Subject deletion failed: User {username} not authorized")
+        logger.error(f"Subject deletion failed: User {user['username']} not authorized")
         raise HTTPException(status_code=403, detail="Not authorized")
     existing_subject = await db.subjects.find_one({"subject_id": subject_id})
     if not existing_subject:
@@ -81,21 +76,21 @@ async def delete_subject(subject_id: str, username: str):
         raise HTTPException(status_code=404, detail="Subject not found")
     try:
         await db.subjects.delete_one({"subject_id": subject_id})
+        invalidate_reference("subjects", subject_id)
+        await bump_version("subjects")
     except Exception as e:
         logger.error(f"Failed to delete subject {subject_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info(f"Subject deleted: {subject_id}")
     return {"message": f"Subject {subject_id} deleted successfully"}
 
-async def list_subjects(username: str):
-    user = await db.users.find_one({"username": username})
-    if not user:
-        logger.error(f"Subjects retrieval failed: User {username} not found")
-        raise HTTPException(status_code=401, detail="User not found")
+async def list_subjects(user: dict, page: PageParams):
     try:
-        subjects = await db.subjects.find().to_list(length=None)
+        subjects = await paginate(db.subjects, page, key="subject_id", model=Subject)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to retrieve subjects: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
     logger.info("Subjects retrieved")
-    return [Subject(**subject) for subject in subjects]
\ No newline at end of file
+    return subjects
\ No newline at end of file
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from infrastructure.metrics import CallbackMetric
+import time
+
+# Registry of named caches so their counters can be reported in one place
+caches: Dict[str, "TTLCache"] = {}
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after a fixed TTL."""
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        caches[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+def cache_stats() -> dict:
+    """Return hit/miss counters for every registered cache."""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+def cache_samples(field: str):
+    def collect():
+        for name, stats in cache_stats().items():
+            yield (name,), stats[field]
+    return collect
+
+CallbackMetric("tms_cache_hits_total", "Cache lookups that found a live entry", ("cache",), cache_samples("hits"), type_name="counter")
+CallbackMetric("tms_cache_misses_total", "Cache lookups that found no live entry", ("cache",), cache_samples("misses"), type_name="counter")
+CallbackMetric("tms_cache_evictions_total", "Entries evicted to stay within max_size", ("cache",), cache_samples("evictions"), type_name="counter")
+CallbackMetric("tms_cache_hit_ratio", "Hits over lookups since startup", ("cache",), cache_samples("hit_ratio"))
+CallbackMetric("tms_cache_entries", "Entries currently held", ("cache",), cache_samples("size"))
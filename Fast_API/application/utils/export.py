@@ -0,0 +1,82 @@
+from typing import AsyncIterator, Literal, Optional
+from datetime import date
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+
+class ExportParams:
+    """Query parameters shared by the export endpoints."""
+
+    def __init__(
+        self,
+        format: Literal["ndjson", "json"] = "ndjson",
+        date_from: Optional[date] = Query(None, description="Inclusive start date"),
+        date_to: Optional[date] = Query(None, description="Inclusive end date"),
+        class_id: Optional[str] = None,
+        student_id: Optional[str] = None
+    ):
+        self.format = format
+        self.date_from = date_from
+        self.date_to = date_to
+        self.class_id = class_id
+        self.student_id = student_id
+
+    def query(self, date_field: str) -> dict:
+        """Build the Mongo filter for these parameters; dates are stored as ISO strings."""
+        query = {}
+        if self.date_from or self.date_to:
+            query[date_field] = {}
+            if self.date_from:
+                query[date_field]["$gte"] = self.date_from.isoformat()
+            if self.date_to:
+                query[date_field]["$lte"] = self.date_to.isoformat()
+        if self.class_id:
+            query["class_id"] = self.class_id
+        if self.student_id:
+            query["student_id"] = self.student_id
+        return query
+
+async def stream_documents(cursor, format: str) -> AsyncIterator[bytes]:
+    """Encode a Motor cursor as NDJSON lines or as a chunked JSON array, one batch at a time."""
+    if format == "json":
+        yield b"["
+    first = True
+    count = 0
+    chunk = []
+    try:
+        async for document in cursor:
+            line = json.dumps(document, default=str)
+            if format == "json":
+                chunk.append(line if first else "," + line)
+            else:
+                chunk.append(line + "\n")
+            first = False
+            count += 1
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield "".join(chunk).encode()
+                chunk = []
+        if chunk:
+            yield "".join(chunk).encode()
+    except Exception as e:
+        # Headers are already sent, so the client only sees a truncated body
+        logger.error(f"Export aborted after {count} documents: {str(e)}", exc_info=True)
+        raise
+    if format == "json":
+        yield b"]"
+    logger.info(f"Export finished: {count} documents")
+
+def export_response(collection, query: dict, params: ExportParams, sort_field: str, filename: str) -> StreamingResponse:
+    """Stream the documents matching query as an attachment, without materializing them."""
+    cursor = collection.find(query, projection={"_id": 0}).sort(sort_field, 1).batch_size(EXPORT_BATCH_SIZE)
+    media_type = "application/json" if params.format == "json" else "application/x-ndjson"
+    extension = "json" if params.format == "json" else "ndjson"
+    return StreamingResponse(
+        stream_documents(cursor, params.format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
@@ -0,0 +1,115 @@
+from typing import Literal, Optional, Sequence, Type
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+import base64
+import binascii
+import json
+
+class PageParams:
+    """Query parameters shared by the list endpoints.
+
+    limit/after page through the collection by keyset, fields restricts the returned fields,
+    sort/order choose the (indexed) sort key. all=true returns the whole collection as a plain
+    list, like the list endpoints did before they were paginated.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(50, ge=1, le=500),
+        after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+        sort: Optional[str] = None,
+        order: Literal["asc", "desc"] = "asc",
+        all_pages: bool = Query(False, alias="all")
+    ):
+        self.limit = limit
+        self.after = after
+        self.fields = [field.strip() for field in fields.split(",") if field.strip() not in ("", "_id")] if fields else None
+        self.sort = sort
+        self.order = order
+        self.all_pages = all_pages
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+async def paginate(
+    collection,
+    page: PageParams,
+    *,
+    key: str,
+    model: Type[BaseModel],
+    sort_fields: Sequence[str] = (),
+    query: Optional[dict] = None
+):
+    """Return one keyset page of a collection as {"items": [...], "next_cursor": ...}.
+
+    key is the collection's unique ID field and the default sort. Any other field in sort_fields
+    must have a (field, _id) index, since _id breaks ties between equal sort values.
+    Items are the stored documents projected to the fields of model (or the requested subset of
+    them; other names are rejected with 400), without _id. They are not re-validated: documents
+    are validated by the services when they are written.
+    """
+    query = query or {}
+    model_projection = {field: 1 for field in model.__fields__}
+    # Only fields of the model may be requested, never internal ones such as the search keys
+    unknown_fields = [field for field in page.fields or () if field not in model_projection]
+    if unknown_fields:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown_fields)}")
+    fields_projection = {field: 1 for field in page.fields} if page.fields else model_projection
+    if page.all_pages:
+        return await collection.find(query, projection={**fields_projection, "_id": 0}).to_list(length=None)
+
+    sort_field = page.sort or key
+    if sort_field != key and sort_field not in sort_fields:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {sort_field}")
+    unique_sort = sort_field == key
+    direction = 1 if page.order == "asc" else -1
+    sort = [(sort_field, direction)] if unique_sort else [(sort_field, direction), ("_id", direction)]
+
+    conditions = [query] if query else []
+    if page.after:
+        cursor_values = decode_cursor(page.after)
+        op = "$gt" if direction == 1 else "$lt"
+        if unique_sort:
+            conditions.append({sort_field: {op: cursor_values[0]}})
+        else:
+            try:
+                last_id = ObjectId(cursor_values[1])
+            except (IndexError, InvalidId, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            conditions.append({"$or": [
+                {sort_field: {op: cursor_values[0]}},
+                {sort_field: cursor_values[0], "_id": {op: last_id}}
+            ]})
+    filter_ = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+
+    # _id stays in the projection for the cursor and is dropped from the items below
+    projection = {**fields_projection, sort_field: 1}
+
+    documents = await collection.find(filter_, projection=projection).sort(sort).limit(page.limit + 1).to_list(length=page.limit + 1)
+    has_more = len(documents) > page.limit
+    documents = documents[:page.limit]
+
+    next_cursor = None
+    if has_more:
+        last = documents[-1]
+        next_cursor = encode_cursor([last.get(sort_field)] if unique_sort else [last.get(sort_field), str(last["_id"])])
+
+    if page.fields:
+        items = [{field: document[field] for field in page.fields if field in document} for document in documents]
+    else:
+        items = documents
+        for document in items:
+            del document["_id"]
+    return {"items": items, "next_cursor": next_cursor}
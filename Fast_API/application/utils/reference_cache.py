@@ -0,0 +1,42 @@
+from typing import Optional
+from infrastructure.database import db
+from application.utils.cache import TTLCache
+from config.settings import REFERENCE_CACHE_MAX_SIZE, REFERENCE_CACHE_TTL_SECONDS
+
+# Rarely changing collections served through a read-through cache, keyed by their ID field
+REFERENCE_KEYS = {
+    "subjects": "subject_id",
+    "classes": "class_id",
+    "teachers": "teacher_id",
+}
+reference_caches = {
+    collection: TTLCache(collection, max_size=REFERENCE_CACHE_MAX_SIZE, ttl_seconds=REFERENCE_CACHE_TTL_SECONDS)
+    for collection in REFERENCE_KEYS
+}
+
+async def get_reference(collection: str, id_value: str, min_version: int = 0) -> Optional[dict]:
+    """Return the document (without _id) whose ID field equals id_value, or None.
+
+    min_version is the collection version the caller read before calling (see conditional_get).
+    Entries are stored with the version their caller read, and an entry older than min_version is
+    refetched: it may have been loaded by a query racing with a write, here or in another process,
+    and must not be served under the ETag of the version that write produced.
+    The returned document is shared with the cache and must not be modified.
+    """
+    cache = reference_caches[collection]
+    entry = cache.get(id_value)
+    if entry is not None and entry[0] >= min_version:
+        return entry[1]
+    document = await db[collection].find_one({REFERENCE_KEYS[collection]: id_value}, projection={"_id": 0})
+    if document is not None:
+        cache.set(id_value, (min_version, document))
+    return document
+
+def invalidate_reference(collection: str, *id_values: str):
+    """Drop cached documents after a write, before its bump_version; call with every ID the write may have touched."""
+    for id_value in id_values:
+        reference_caches[collection].invalidate(id_value)
+
+def clear_references(collection: str):
+    """Drop every cached document of a collection, e.g. after a bulk repair."""
+    reference_caches[collection].clear()
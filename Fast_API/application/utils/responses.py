@@ -0,0 +1,73 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library encoder
+    orjson = None
+
+def encode_default(value: Any):
+    """Encode the few non-JSON types found in documents and service results."""
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)  # ObjectId and anything else rendered by its string form
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes its content directly, with orjson when it is installed.
+
+    Returning one from an endpoint skips FastAPI's response validation and jsonable_encoder pass,
+    so it is meant for content that is already plain data, such as projected Mongo documents.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=encode_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Opt-in list encoding: {"fields": [...], "columns": [[...], ...], "count": n, "next_cursor": ...}
+COLUMNAR_MEDIA_TYPE = "application/vnd.tms.columnar+json"
+
+def wants_columnar(request: Request) -> bool:
+    return COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+def to_columns(items: list) -> dict:
+    """Transpose a list of documents into field names plus one value array per field.
+
+    Fields are listed in first-seen order; a document lacking a field contributes null.
+    """
+    fields = {}
+    for item in items:
+        for field in item:
+            fields.setdefault(field, None)
+    names = list(fields)
+    return {
+        "fields": names,
+        "columns": [[item.get(field) for item in items] for field in names],
+        "count": len(items),
+    }
+
+def negotiate_response(request: Request, content: Any) -> JSONResponse:
+    """Encode a list endpoint result as JSON, or columnar when the client's Accept header asks for it.
+
+    content is either a page ({"items": [...], "next_cursor": ...}) or a plain list (all=true) of
+    documents; anything else is always returned as plain JSON.
+    """
+    response = None
+    if wants_columnar(request):
+        if isinstance(content, dict) and "items" in content and "next_cursor" in content:
+            response = FastJSONResponse({**to_columns(content["items"]), "next_cursor": content["next_cursor"]}, media_type=COLUMNAR_MEDIA_TYPE)
+        elif isinstance(content, list) and all(isinstance(item, dict) for item in content):
+            response = FastJSONResponse({**to_columns(content), "next_cursor": None}, media_type=COLUMNAR_MEDIA_TYPE)
+    if response is None:
+        response = FastJSONResponse(content)
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,78 @@
+from typing import List, Type
+from pydantic import BaseModel
+from infrastructure.database import db
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# People collections searchable by name or ID prefix -> (first name, last name, ID) fields
+SEARCH_FIELDS = {
+    "students": ("first_name", "last_name", "student_id"),
+    "teachers": ("first_name", "last_name", "teacher_id"),
+}
+
+def normalize(value) -> str:
+    return str(value or "").strip().lower()
+
+def search_keys(collection: str, document: dict) -> dict:
+    """Build the lowercase "search" subdocument stored next to each student or teacher.
+
+    Anchored regexes on these fields are case sensitive, so they use the search.* indexes as
+    plain range scans, unlike case-insensitive regexes on the original fields.
+    """
+    first_field, last_field, id_field = SEARCH_FIELDS[collection]
+    return {
+        "first": normalize(document.get(first_field)),
+        "last": normalize(document.get(last_field)),
+        "id": normalize(document.get(id_field)),
+    }
+
+# Ranking tiers for search results: first-name matches, then last-name matches, then ID matches.
+# Each tier is ordered by its own compound search index, so it is read as a sorted, limited range scan.
+SEARCH_TIERS = (
+    ("search.first", [("search.first", 1), ("search.last", 1), ("search.id", 1)]),
+    ("search.last", [("search.last", 1), ("search.first", 1), ("search.id", 1)]),
+    ("search.id", [("search.id", 1)]),
+)
+
+async def find_matches(collection, q: str, limit: int) -> List[dict]:
+    """Return the first limit documents whose first name, last name or ID starts with q, ignoring case.
+
+    A document matching several fields is ranked by its earliest tier. A later tier is only queried
+    when the earlier ones held fewer than limit matches, i.e. all of them have been read, so at most
+    len(documents) of its documents are duplicates and fetching limit of them is enough.
+    """
+    term = normalize(q)
+    if not term:
+        return []  # A blank query would match everything
+    prefix = {"$regex": "^" + re.escape(term)}
+    documents, seen = [], set()
+    for field, order in SEARCH_TIERS:
+        if len(documents) >= limit:
+            break
+        async for document in collection.find({field: prefix}).sort(order).limit(limit):
+            if document["_id"] not in seen:
+                seen.add(document["_id"])
+                documents.append(document)
+    return documents[:limit]
+
+async def search_documents(collection, q: str, limit: int, model: Type[BaseModel]) -> List[BaseModel]:
+    """Return up to limit documents whose first name, last name or ID starts with q, ignoring case."""
+    documents = await find_matches(collection, q, limit)
+    return [model(**document) for document in documents]
+
+async def backfill_search_keys():
+    """Migration: add the search subdocument to students and teachers written before it existed."""
+    for collection, (first_field, last_field, id_field) in SEARCH_FIELDS.items():
+        # Mirrors search_keys; $toLower matches str.lower for the ASCII names stored today
+        result = await db[collection].update_many(
+            {"search": {"$exists": False}},
+            [{"$set": {"search": {
+                "first": {"$toLower": {"$trim": {"input": {"$ifNull": [{"$toString": f"${first_field}"}, ""]}}}},
+                "last": {"$toLower": {"$trim": {"input": {"$ifNull": [{"$toString": f"${last_field}"}, ""]}}}},
+                "id": {"$toLower": {"$trim": {"input": {"$ifNull": [{"$toString": f"${id_field}"}, ""]}}}},
+            }}}]
+        )
+        if result.modified_count:
+            logger.info(f"Search keys added to {result.modified_count} {collection}")
@@ -1,5 +1,8 @@
 from datetime import date
+from typing import List, Optional, Tuple
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import re
 
 def get_today() -> str:
     """Return today's date in YYYY-MM-DD format."""
@@ -13,4 +16,31 @@ def serialize_object_ids(data):
         return {k: serialize_object_ids(v) if k != "_id" else str(v) for k, v in data.items()}
     if isinstance(data, ObjectId):
         return str(data)
-    return data
\ No newline at end of file
+    return data
+
+def duplicate_key_field(error: DuplicateKeyError) -> Optional[str]:
+    """Return the first field of the unique index that raised a DuplicateKeyError."""
+    key_pattern = (error.details or {}).get("keyPattern")
+    if key_pattern:
+        return next(iter(key_pattern))
+    # Older servers only name the index in the message, e.g. "index: email_unique dup key"
+    match = re.search(r"index: (\w+?)(?:_unique)?\s", str(error))
+    return match.group(1) if match else None
+
+async def insert_many_unordered(collection, documents: list) -> Tuple[int, List[Tuple[int, str]]]:
+    """Insert documents in one unordered batch. Return the inserted count and (position, error) per failed document."""
+    if not documents:
+        return 0, []
+    try:
+        result = await collection.insert_many(documents, ordered=False)
+        return len(result.inserted_ids), []
+    except BulkWriteError as e:
+        failures = []
+        for write_error in e.details.get("writeErrors", []):
+            if write_error.get("code") == 11000:
+                field = next(iter(write_error.get("keyPattern") or {}), "ID")
+                message = f"{field} already exists"
+            else:
+                message = write_error.get("errmsg", "Write failed")
+            failures.append((write_error["index"], message))
+        return e.details.get("nInserted", 0), failures
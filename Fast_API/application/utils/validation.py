@@ -0,0 +1,45 @@
+from typing import List, NamedTuple
+from fastapi import HTTPException
+from infrastructure.database import db
+from application.utils.reference_cache import REFERENCE_KEYS, get_reference
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Reference(NamedTuple):
+    """A document that must exist: db[collection] has a document whose field equals value."""
+    collection: str
+    field: str
+    value: str
+    label: str
+
+def student_ref(student_id: str) -> Reference:
+    return Reference("students", "student_id", student_id, "Student")
+
+def teacher_ref(teacher_id: str) -> Reference:
+    return Reference("teachers", "teacher_id", teacher_id, "Teacher")
+
+def subject_ref(subject_id: str) -> Reference:
+    return Reference("subjects", "subject_id", subject_id, "Subject")
+
+def class_ref(class_id: str) -> Reference:
+    return Reference("classes", "class_id", class_id, "Class")
+
+async def reference_exists(reference: Reference) -> bool:
+    if REFERENCE_KEYS.get(reference.collection) == reference.field:
+        return await get_reference(reference.collection, reference.value) is not None
+    return await db[reference.collection].find_one({reference.field: reference.value}, projection={"_id": 1}) is not None
+
+async def missing_references(*references: Reference) -> List[Reference]:
+    """Check all references concurrently and return the ones that do not exist, in the given order."""
+    found = await asyncio.gather(*(reference_exists(reference) for reference in references))
+    return [reference for reference, exists in zip(references, found) if not exists]
+
+async def require_references(context: str, *references: Reference):
+    """Raise a 404 naming the first missing reference; every missing one is logged."""
+    missing = await missing_references(*references)
+    for reference in missing:
+        logger.error(f"{context} failed: {reference.label} {reference.value} not found")
+    if missing:
+        raise HTTPException(status_code=404, detail=f"{missing[0].label} not found")
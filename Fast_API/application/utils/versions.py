@@ -0,0 +1,53 @@
+from typing import Awaitable, Callable
+from fastapi import Request, Response
+from infrastructure.counters import read_sequence, reserve_sequence
+from application.utils.responses import negotiate_response
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Collections whose GET responses carry an ETag derived from a version stamp.
+# Every service write to one of them must call bump_version afterwards.
+VERSIONED_COLLECTIONS = ("students", "teachers", "classes", "subjects")
+
+def version_counter(collection: str) -> str:
+    return f"version:{collection}"
+
+async def bump_version(collection: str):
+    """Invalidate the ETags of a collection after a create, update or delete."""
+    await reserve_sequence(version_counter(collection))
+
+async def collection_version(collection: str) -> int:
+    return await read_sequence(version_counter(collection))
+
+def make_etag(collection: str, version: int, request: Request) -> str:
+    # The same version serves different bodies per path, query (page, fields, sort...) and Accept (columnar)
+    variant = f"{request.url.path}?{request.url.query}|{request.headers.get('accept', '')}"
+    variant = hashlib.sha1(variant.encode()).hexdigest()[:16]
+    return f'W/"{collection}-{version}-{variant}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def conditional_get(request: Request, collection: str, produce: Callable[[int], Awaitable]) -> Response:
+    """Answer a GET on a versioned collection, with 304 and no query when the client's copy is current.
+
+    The version is read before produce runs, so a write racing with the query can only make the
+    ETag older than the body, which costs the client one extra full response later, never a stale one.
+    produce receives that version; bodies served from the reference cache must be at least as new.
+    """
+    version = await collection_version(collection)
+    etag = make_etag(collection, version, request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+    if etag_matches(request, etag):
+        logger.debug(f"Not modified: {request.url.path} ({etag})")
+        return Response(status_code=304, headers=headers)
+    content = await produce(version)
+    response = content if isinstance(content, Response) else negotiate_response(request, content)
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,47 @@
+"""Compare per-request authorization cost: signed-token verification vs. a users lookup in MongoDB.
+
+Run from the Fast_API directory with a local MongoDB available and SECRET_KEY set:
+
+    SECRET_KEY=bench python -m benchmarks.bench_auth [iterations]
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from config.settings import MONGO_HOST, MONGO_PORT
+from application.services import auth_service
+import asyncio
+import statistics
+import sys
+import time
+
+BENCH_DATABASE = "tcms_bench"
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<22} mean={statistics.mean(samples) * 1e6:9.1f}us  p50={statistics.median(samples) * 1e6:9.1f}us  p99={p99 * 1e6:9.1f}us")
+
+async def main(iterations: int):
+    token = auth_service.create_access_token("bench_admin", "Admin")
+    token_samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        auth_service.verify_access_token(token)
+        token_samples.append(time.perf_counter() - start)
+    report("token verification", token_samples)
+
+    client = AsyncIOMotorClient(f"mongodb://{MONGO_HOST}:{MONGO_PORT}", serverSelectionTimeoutMS=2000)
+    db = client[BENCH_DATABASE]
+    try:
+        await db.users.replace_one({"username": "bench_admin"}, {"username": "bench_admin", "role": "Admin", "email": "bench@example.com"}, upsert=True)
+    except Exception as e:
+        print(f"MongoDB not reachable, skipping lookup benchmark: {e}")
+        return
+    lookup_samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await db.users.find_one({"username": "bench_admin"})
+        lookup_samples.append(time.perf_counter() - start)
+    report("users.find_one", lookup_samples)
+    await client.drop_database(BENCH_DATABASE)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,52 @@
+"""Measure how a burst of logins affects the latency of unrelated requests on the same event loop.
+
+While many bcrypt verifications run concurrently, a probe task schedules a trivial
+"request" every few milliseconds and records how long it waited to run. The storm is run
+once with bcrypt called inline (the old behaviour) and once through the password pool.
+
+Run from the Fast_API directory (no database needed):
+
+    python -m benchmarks.bench_login_storm [logins]
+"""
+from application.services import auth_service
+import asyncio
+import statistics
+import sys
+import time
+
+PROBE_INTERVAL_SECONDS = 0.005
+
+async def inline_verify(password: str, hashed_password: str) -> bool:
+    return auth_service.pwd_context.verify(password, hashed_password)
+
+async def probe(samples: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        done = loop.create_future()
+        loop.call_soon(lambda: done.set_result(time.perf_counter()))
+        samples.append(await done - scheduled)
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+async def storm(verify, logins: int, hashed_password: str) -> list:
+    samples = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(samples, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("secret", hashed_password) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    samples.sort()
+    p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+    print(f"{verify.__name__:<16} logins={logins} wall={elapsed:6.2f}s  probes={len(samples):5d}  "
+          f"p50={statistics.median(samples) * 1e3:8.2f}ms  p99={p99 * 1e3:8.2f}ms  max={samples[-1] * 1e3:8.2f}ms")
+    return samples
+
+async def main(logins: int):
+    hashed_password = await auth_service.hash_password("secret")
+    await storm(inline_verify, logins, hashed_password)
+    await storm(auth_service.verify_password, logins, hashed_password)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
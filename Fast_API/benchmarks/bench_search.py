@@ -0,0 +1,69 @@
+"""Time the /students/search prefix query against a case-insensitive regex on the raw fields.
+
+Seeds a scratch database with 100,000 students carrying the normalized search keys and the
+search.* indexes, then reports the median latency of both queries for a few prefixes.
+
+Run from the Fast_API directory with a local MongoDB available:
+
+    python -m benchmarks.bench_search
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+from config.settings import MONGO_HOST, MONGO_PORT
+from application.utils.search import SEARCH_TIERS, find_matches, search_keys
+import asyncio
+import random
+import re
+import statistics
+import string
+import time
+
+BENCH_DATABASE = "tcms_bench"
+STUDENTS = 100_000
+LIMIT = 10
+RUNS = 50
+PREFIXES = ("a", "jo", "smi", "stu0042", "zzz")
+
+def random_name() -> str:
+    return random.choice(string.ascii_uppercase) + "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 9)))
+
+async def seed(db):
+    await db.students.drop()
+    batch = []
+    for i in range(STUDENTS):
+        student = {"student_id": f"STU{i:06d}", "first_name": random_name(), "last_name": random_name()}
+        student["search"] = search_keys("students", student)
+        batch.append(student)
+        if len(batch) == 10_000:
+            await db.students.insert_many(batch)
+            batch = []
+    for _, order in SEARCH_TIERS:
+        await db.students.create_index([(field, ASCENDING) for field, _ in order])
+
+async def indexed(db, q: str):
+    return await find_matches(db.students, q, LIMIT)
+
+async def case_insensitive(db, q: str):
+    prefix = {"$regex": "^" + re.escape(q), "$options": "i"}
+    query = {"$or": [{"first_name": prefix}, {"last_name": prefix}, {"student_id": prefix}]}
+    return await db.students.find(query).limit(LIMIT).to_list(length=LIMIT)
+
+async def measure(label: str, func, db, q: str):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = await func(db, q)
+        timings.append(time.perf_counter() - start)
+    print(f"q={q!r:<10} {label:<17} median={statistics.median(timings) * 1e3:7.2f}ms  results={len(result)}")
+
+async def main():
+    client = AsyncIOMotorClient(f"mongodb://{MONGO_HOST}:{MONGO_PORT}")
+    db = client[BENCH_DATABASE]
+    await seed(db)
+    for q in PREFIXES:
+        await measure("search keys", indexed, db, q)
+        await measure("regex /i", case_insensitive, db, q)
+    await client.drop_database(BENCH_DATABASE)
+
+if __name__ == "__main__":
+    asyncio.run(main())
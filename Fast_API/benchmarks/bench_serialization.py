@@ -0,0 +1,59 @@
+"""Measure the cost of serializing 10,000 students for a list response, before and after the fast path.
+
+before: build a Student per document, then FastAPI's jsonable_encoder and the standard JSONResponse.
+after:  projected documents encoded directly by FastJSONResponse (orjson when installed).
+
+No database is needed. Run from the Fast_API directory:
+
+    python -m benchmarks.bench_serialization
+"""
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from application.utils.responses import FastJSONResponse, orjson
+from domain.models import Student
+import statistics
+import time
+
+DOCUMENTS = 10_000
+RUNS = 20
+
+def make_documents() -> list:
+    return [
+        {
+            "student_id": f"STU{i:06d}",
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "date_of_birth": "2008-05-17",
+            "gender": "Female" if i % 2 else "Male",
+            "contact_number": f"07{i:08d}",
+            "email": f"student{i}@example.com",
+            "address": f"{i} Main Street, Colombo",
+            "enrollment_date": "2024-01-15",
+            "status": "Active",
+        }
+        for i in range(DOCUMENTS)
+    ]
+
+def before(documents: list) -> bytes:
+    items = [Student(**document) for document in documents]
+    return JSONResponse({"items": jsonable_encoder(items), "next_cursor": None}).body
+
+def after(documents: list) -> bytes:
+    return FastJSONResponse({"items": documents, "next_cursor": None}).body
+
+def measure(label: str, func, documents: list):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        body = func(documents)
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<7} median={statistics.median(timings) * 1e3:8.1f}ms per {DOCUMENTS} documents  body={len(body) / 1024:.0f}KiB")
+
+def main():
+    documents = make_documents()
+    print(f"encoder for the fast path: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    measure("before", before, documents)
+    measure("after", after, documents)
+
+if __name__ == "__main__":
+    main()
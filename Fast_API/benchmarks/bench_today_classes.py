@@ -0,0 +1,87 @@
+"""Compare the old N+1 /stats/today-classes queries with the single aggregation pipeline.
+
+Seeds a scratch database with 50, 500 and 5000 ongoing classes (each with a teacher
+assignment and a few attendance records for today), then reports wall time and the
+number of MongoDB commands each implementation sends.
+
+Run from the Fast_API directory with a local MongoDB available:
+
+    python -m benchmarks.bench_today_classes
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from config.settings import MONGO_HOST, MONGO_PORT
+from application.services.statistics_service import today_classes_pipeline
+from application.utils.utils import get_today
+import asyncio
+import time
+
+BENCH_DATABASE = "tcms_bench"
+DAY = "Monday"
+ATTENDANCE_PER_CLASS = 5
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.database_name == BENCH_DATABASE:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def seed(db, classes: int, today: str):
+    await db.classes.delete_many({})
+    await db.attendance.delete_many({})
+    await db.teacher_assignments.delete_many({})
+    await db.classes.insert_many([
+        {"class_id": f"CLS{i}", "class_name": f"Class {i}", "subject_id": "SUB001", "day": DAY,
+         "start_time": "08:00", "end_time": "09:00", "capacity": 30, "status": "Ongoing"}
+        for i in range(classes)
+    ])
+    await db.teacher_assignments.insert_many([
+        {"assignment_id": f"ASG{i}", "teacher_id": "TCH001", "class_id": f"CLS{i}", "assignment_date": today}
+        for i in range(classes)
+    ])
+    await db.attendance.insert_many([
+        {"attendance_id": f"ATT{i}-{j}", "student_id": f"STU{j}", "class_id": f"CLS{i}", "date": today, "status": "Present"}
+        for i in range(classes) for j in range(ATTENDANCE_PER_CLASS)
+    ])
+    await db.attendance.create_index([("class_id", 1), ("date", 1)])
+    await db.teacher_assignments.create_index("class_id")
+    await db.classes.create_index([("day", 1), ("status", 1)])
+
+async def legacy(db, today: str):
+    classes = await db.classes.find({"day": DAY, "status": "Ongoing"}).to_list(length=None)
+    for class_ in classes:
+        class_["attendance"] = await db.attendance.find({"class_id": class_["class_id"], "date": today}).to_list(length=None)
+        class_["teacher_assignment"] = await db.teacher_assignments.find_one({"class_id": class_["class_id"]})
+    return classes
+
+async def pipeline(db, today: str):
+    return await db.classes.aggregate(today_classes_pipeline(DAY, today)).to_list(length=None)
+
+async def measure(label: str, func, db, today: str, counter: CommandCounter, classes: int):
+    counter.count = 0
+    start = time.perf_counter()
+    result = await func(db, today)
+    elapsed = time.perf_counter() - start
+    print(f"{classes:>5} classes  {label:<9} {elapsed * 1e3:9.1f}ms  commands={counter.count:5d}  results={len(result)}")
+
+async def main():
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(f"mongodb://{MONGO_HOST}:{MONGO_PORT}", event_listeners=[counter])
+    db = client[BENCH_DATABASE]
+    today = get_today()
+    for classes in (50, 500, 5000):
+        await seed(db, classes, today)
+        await measure("N+1", legacy, db, today, counter, classes)
+        await measure("pipeline", pipeline, db, today, counter, classes)
+    await client.drop_database(BENCH_DATABASE)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,108 @@
+from typing import Optional
 import logging
 
-# MongoDB configuration
-MONGO_HOST = "localhost"
-MONGO_PORT = 27017
-MONGO_DATABASE = "tcms"
+try:
+    from pydantic_settings import BaseSettings, SettingsConfigDict
+except ImportError:  # Pydantic 1 ships BaseSettings itself
+    from pydantic import BaseSettings
+    SettingsConfigDict = None
+
+class Settings(BaseSettings):
+    """Typed configuration. Every field can be overridden by an environment variable of the same
+    name (case-insensitive) or by a .env file in the working directory; the defaults below apply otherwise.
+    """
+
+    # MongoDB configuration
+    MONGO_HOST: str = "localhost"
+    MONGO_PORT: int = 27017
+    MONGO_DATABASE: str = "tcms"
+
+    # MongoDB client and connection pool (driver defaults where None)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGO_CONNECT_TIMEOUT_MS: int = 20000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGO_COMPRESSORS: str = ""  # Comma-separated wire compressors in preference order, e.g. "zstd,snappy,zlib"
+    MONGO_WRITE_CONCERN: Optional[str] = None  # "majority" or a number of nodes; None uses the server default
+    MONGO_JOURNAL: Optional[bool] = None
+    MONGO_READ_PREFERENCE: str = "primary"
+
+    # User lookup cache configuration
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # Subject/class/teacher read-through cache configuration
+    REFERENCE_CACHE_MAX_SIZE: int = 5000
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+
+    # Dashboard entity counts snapshot lifetime
+    COUNTS_CACHE_TTL_SECONDS: int = 5
+
+    # Access token configuration
+    SECRET_KEY: str = ""  # Required: set a long random value, e.g. from secrets.token_urlsafe(32)
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Accept the unauthenticated ?username= query parameter of older clients (insecure; keep off)
+    ALLOW_USERNAME_AUTH: bool = False
+
+    # Password hashing configuration
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Payment IDs reserved per process and database round trip (1 = no gaps after restarts)
+    PAYMENT_ID_BLOCK_SIZE: int = 1
+
+    # Background jobs allowed to run at the same time in one process
+    JOB_CONCURRENCY: int = 2
+    # Lease on unfinished jobs, renewed by the owning process every third of it; queued or running
+    # jobs whose lease expired belong to a stopped process and are marked failed
+    JOB_LEASE_SECONDS: int = 30
+
+    # Responses smaller than this many bytes are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1024
+
+    LOG_LEVEL: str = "DEBUG"
+
+    if SettingsConfigDict is not None:
+        model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
+    else:
+        class Config:
+            env_file = ".env"
+            case_sensitive = False
+            extra = "ignore"
+
+settings = Settings()
+
+# Module-level names used throughout the application
+MONGO_HOST = settings.MONGO_HOST
+MONGO_PORT = settings.MONGO_PORT
+MONGO_DATABASE = settings.MONGO_DATABASE
+USER_CACHE_MAX_SIZE = settings.USER_CACHE_MAX_SIZE
+USER_CACHE_TTL_SECONDS = settings.USER_CACHE_TTL_SECONDS
+REFERENCE_CACHE_MAX_SIZE = settings.REFERENCE_CACHE_MAX_SIZE
+REFERENCE_CACHE_TTL_SECONDS = settings.REFERENCE_CACHE_TTL_SECONDS
+COUNTS_CACHE_TTL_SECONDS = settings.COUNTS_CACHE_TTL_SECONDS
+SECRET_KEY = settings.SECRET_KEY
+ALGORITHM = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+ALLOW_USERNAME_AUTH = settings.ALLOW_USERNAME_AUTH
+BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
+PASSWORD_HASH_WORKERS = settings.PASSWORD_HASH_WORKERS
+PAYMENT_ID_BLOCK_SIZE = settings.PAYMENT_ID_BLOCK_SIZE
+JOB_CONCURRENCY = settings.JOB_CONCURRENCY
+JOB_LEASE_SECONDS = settings.JOB_LEASE_SECONDS
+GZIP_MINIMUM_SIZE = settings.GZIP_MINIMUM_SIZE
+
+# Token signing keys that must never be used: empty, or the placeholder published in earlier versions
+INSECURE_SECRET_KEYS = {"", "change-me-in-production"}
+
+def require_secret_key():
+    """Refuse to run the API with a missing or publicly known token signing key."""
+    if settings.SECRET_KEY.strip() in INSECURE_SECRET_KEYS:
+        raise RuntimeError("SECRET_KEY is not set: define it in the environment or in .env before starting the API")
 
 # Logging configuration
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=settings.LOG_LEVEL.upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
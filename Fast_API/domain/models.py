@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from enum import Enum
-from datetime import date
+from datetime import date, datetime
 
 # Enums for Status Fields
 class UserRole(str, Enum):
@@ -22,6 +22,13 @@ class ClassStatus(str, Enum):
     completed = "Completed"
     cancelled = "Cancelled"
 
+class JobStatus(str, Enum):
+    queued = "Queued"
+    running = "Running"
+    succeeded = "Succeeded"
+    failed = "Failed"
+    cancelled = "Cancelled"
+
 class PaymentStatus(str, Enum):
     paid = "Paid"
     pending = "Pending"
@@ -92,6 +99,11 @@ class TeacherAssignment(BaseModel):
     class_id: str
     assignment_date: date
 
+class Enrollment(BaseModel):
+    student_id: str
+    class_id: str
+    enrollment_date: date
+
 class Payment(BaseModel):
     payment_id: Optional[str] = None
     student_id: str
@@ -109,6 +121,16 @@ class Attendance(BaseModel):
     date: date
     status: AttendanceStatus
 
+class AttendanceRecord(BaseModel):
+    attendance_id: str
+    student_id: str
+    status: AttendanceStatus
+
+class AttendanceSession(BaseModel):
+    class_id: str
+    date: date
+    records: List[AttendanceRecord]
+
 class Grade(BaseModel):
     grade_id: str
     student_id: str
@@ -117,12 +139,51 @@ class Grade(BaseModel):
     score: float
     date: date
 
+# Bulk Write Models
+class BulkRowError(BaseModel):
+    row: int  # 0-based position of the record in the request: records list index, or CSV data row after the header
+    id: Optional[str] = None
+    error: str
+
+class BulkWriteSummary(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+
+# Job Models
+class JobRequest(BaseModel):
+    type: str
+    params: dict = {}
+
+class JobProgress(BaseModel):
+    stage: str
+    done: int
+    total: int
+
+class Job(BaseModel):
+    job_id: str
+    type: str
+    params: dict = {}
+    status: JobStatus
+    submitted_by: str
+    owner: Optional[str] = None  # OWNER_ID of the process running the job
+    lease_expires_at: Optional[datetime] = None  # Renewed by the owner while it is alive
+    cancel_requested: bool = False  # Set by cancel requests served by another process
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    progress: Optional[JobProgress] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
 # Stats Models
 class EntityCounts(BaseModel):
     students: int
     teachers: int
     subjects: int
     classes: int
+    enrollments: int
     teacher_assignments: int
     payments: int
     attendance: int
@@ -132,6 +193,22 @@ class TodayIncome(BaseModel):
     today_income: float
     date: str
 
+class IncomeGranularity(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+class IncomePoint(BaseModel):
+    period: str
+    income: float
+    payments: int
+
+class IncomeSeries(BaseModel):
+    granularity: IncomeGranularity
+    date_from: str
+    date_to: str
+    points: List[IncomePoint]
+
 class TodayClass(BaseModel):
     class_id: str
     class_name: str
@@ -0,0 +1,47 @@
+from pymongo import ReturnDocument
+from infrastructure.database import db
+import asyncio
+
+async def reserve_sequence(name: str, count: int = 1) -> int:
+    """Atomically advance the named counter by count and return its new (last reserved) value."""
+    counter = await db.counters.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"]
+
+async def read_sequence(name: str) -> int:
+    """Return the named counter's current value without advancing it (0 if it was never used)."""
+    counter = await db.counters.find_one({"_id": name})
+    return counter["seq"] if counter else 0
+
+async def seed_sequence(name: str, value: int):
+    """Raise the named counter to at least value. Never moves it backwards, so it is safe to rerun."""
+    await db.counters.update_one({"_id": name}, {"$max": {"seq": value}}, upsert=True)
+
+class SequenceAllocator:
+    """Hands out increasing numbers from a counter document.
+
+    With block_size > 1 each process reserves a block of numbers in one round trip and serves
+    the following allocations from memory. Numbers are still unique across processes, but a
+    restart leaves the unused part of the block as a gap.
+    """
+
+    def __init__(self, name: str, block_size: int = 1):
+        self.name = name
+        self.block_size = max(block_size, 1)
+        self._next = 1
+        self._last = 0
+        self._lock = asyncio.Lock()
+
+    async def next(self) -> int:
+        async with self._lock:
+            if self._next > self._last:
+                self._last = await reserve_sequence(self.name, self.block_size)
+                self._next = self._last - self.block_size + 1
+            value = self._next
+            self._next += 1
+            return value
+
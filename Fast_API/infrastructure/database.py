@@ -1,11 +1,119 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from config.settings import MONGO_HOST, MONGO_PORT, MONGO_DATABASE
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from config.settings import settings
+from infrastructure.monitoring import command_monitor, pool_monitor
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-client = AsyncIOMotorClient(f"mongodb://{MONGO_HOST}:{MONGO_PORT}")
-db = client[MONGO_DATABASE]
+def client_options() -> dict:
+    """Motor client keyword options built from the settings; unset optional values keep the driver defaults."""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+    }
+    if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_SOCKET_TIMEOUT_MS is not None:
+        options["socketTimeoutMS"] = settings.MONGO_SOCKET_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    if settings.MONGO_WRITE_CONCERN:
+        write_concern = settings.MONGO_WRITE_CONCERN
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    if settings.MONGO_JOURNAL is not None:
+        options["journal"] = settings.MONGO_JOURNAL
+    return options
+
+# The client connects lazily on first use; importing this module opens no connection
+client = AsyncIOMotorClient(
+    f"mongodb://{settings.MONGO_HOST}:{settings.MONGO_PORT}",
+    event_listeners=[pool_monitor, command_monitor],
+    **client_options()
+)
+db = client[settings.MONGO_DATABASE]
+
+# Index manifest: collection name -> indexes that must exist on it.
+# Unique indexes back the duplicate checks in the services (DuplicateKeyError -> 400).
+# (field, _id) indexes back the non-ID sort keys offered by the paginated list endpoints.
+# search.* indexes back the anchored prefix matches of the typeahead search endpoints and their ranking order.
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "students": [
+        IndexModel([("student_id", ASCENDING)], name="student_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("last_name", ASCENDING), ("_id", ASCENDING)], name="last_name_id"),
+        IndexModel([("enrollment_date", ASCENDING), ("_id", ASCENDING)], name="enrollment_date_id"),
+        IndexModel([("search.first", ASCENDING), ("search.last", ASCENDING), ("search.id", ASCENDING)], name="search_first_last_id"),
+        IndexModel([("search.last", ASCENDING), ("search.first", ASCENDING), ("search.id", ASCENDING)], name="search_last_first_id"),
+        IndexModel([("search.id", ASCENDING)], name="search_id"),
+    ],
+    "teachers": [
+        IndexModel([("teacher_id", ASCENDING)], name="teacher_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("last_name", ASCENDING), ("_id", ASCENDING)], name="last_name_id"),
+        IndexModel([("search.first", ASCENDING), ("search.last", ASCENDING), ("search.id", ASCENDING)], name="search_first_last_id"),
+        IndexModel([("search.last", ASCENDING), ("search.first", ASCENDING), ("search.id", ASCENDING)], name="search_last_first_id"),
+        IndexModel([("search.id", ASCENDING)], name="search_id"),
+    ],
+    "subjects": [
+        IndexModel([("subject_id", ASCENDING)], name="subject_id_unique", unique=True),
+    ],
+    "classes": [
+        IndexModel([("class_id", ASCENDING)], name="class_id_unique", unique=True),
+        IndexModel([("day", ASCENDING), ("status", ASCENDING)], name="day_status"),
+    ],
+    "enrollments": [
+        # One index per direction: class -> students (roster) and student -> classes
+        IndexModel([("class_id", ASCENDING), ("student_id", ASCENDING)], name="class_id_student_id_unique", unique=True),
+        IndexModel([("student_id", ASCENDING), ("class_id", ASCENDING)], name="student_id_class_id"),
+    ],
+    "teacher_assignments": [
+        IndexModel([("assignment_id", ASCENDING)], name="assignment_id_unique", unique=True),
+        IndexModel([("class_id", ASCENDING)], name="class_id"),
+    ],
+    "payments": [
+        # Partial so that legacy documents without a payment_id (see clean_payments) do not collide
+        IndexModel([("payment_id", ASCENDING)], name="payment_id_unique", unique=True,
+                   partialFilterExpression={"payment_id": {"$type": "string"}}),
+        IndexModel([("payment_date", ASCENDING), ("status", ASCENDING)], name="payment_date_status"),
+        IndexModel([("payment_date", ASCENDING), ("_id", ASCENDING)], name="payment_date_id"),
+        # Per-student history: equality on student_id, then the same keyset order as payment_date_id
+        IndexModel([("student_id", ASCENDING), ("payment_date", ASCENDING), ("_id", ASCENDING)], name="student_id_payment_date_id"),
+    ],
+    "attendance": [
+        IndexModel([("attendance_id", ASCENDING)], name="attendance_id_unique", unique=True),
+        IndexModel([("class_id", ASCENDING), ("date", ASCENDING)], name="class_id_date"),
+        IndexModel([("date", ASCENDING), ("_id", ASCENDING)], name="date_id"),
+    ],
+    "grades": [
+        IndexModel([("grade_id", ASCENDING)], name="grade_id_unique", unique=True),
+        IndexModel([("date", ASCENDING), ("_id", ASCENDING)], name="date_id"),
+    ],
+    "jobs": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+}
+
+async def ensure_indexes():
+    """Create every index in the manifest. Safe to run on each startup: existing indexes are left alone."""
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                # Typically existing duplicates blocking a unique index; keep serving and report it
+                logger.error(f"Failed to create index {index.document['name']} on {collection}: {e}")
+    logger.info("Database indexes ensured")
 
 async def init_db():
     try:
@@ -14,3 +122,19 @@ async def init_db():
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
+    await ensure_indexes()
+
+async def database_health() -> dict:
+    """Ping the server and report its latency together with live connection pool usage."""
+    health = {"database": settings.MONGO_DATABASE, "options": client_options()}
+    start = time.perf_counter()
+    try:
+        await db.command("ping")
+        health["status"] = "ok"
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}")
+        health["status"] = "unavailable"
+        health["error"] = str(e)
+    health["ping_ms"] = round((time.perf_counter() - start) * 1e3, 2)
+    health["pools"] = pool_monitor.snapshot()
+    return health
@@ -0,0 +1,134 @@
+from pymongo import monitoring
+from infrastructure.metrics import CallbackMetric, Counter, Histogram
+import threading
+
+mongo_command_seconds = Histogram(
+    "tms_mongo_command_duration_seconds", "MongoDB command round-trip time as measured by the driver",
+    ("collection", "command")
+)
+mongo_command_errors = Counter(
+    "tms_mongo_command_errors_total", "MongoDB commands that failed", ("collection", "command")
+)
+
+def command_collection(command_name: str, command) -> str:
+    """The collection a command targets: the value of its first key, or the collection field of a getMore."""
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+class CommandMonitor(monitoring.CommandListener):
+    """Records the duration and outcome of every command the driver sends, per collection and command."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (connection, request id) -> collection; only started events carry the command document
+        self._pending = {}
+
+    def started(self, event):
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = command_collection(event.command_name, event.command)
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        mongo_command_seconds.observe(event.duration_micros / 1e6, self._finish(event), event.command_name)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_command_seconds.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongo_command_errors.inc(collection, event.command_name)
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks live connection pool usage per server from the driver's CMAP events.
+
+    The driver may publish events from its own threads, so updates are serialized with a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+
+    def _pool(self, address) -> dict:
+        key = f"{address[0]}:{address[1]}"
+        if key not in self._pools:
+            self._pools[key] = {
+                "open": 0,
+                "checked_out": 0,
+                "waiting": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "cleared": 0,
+            }
+        return self._pools[key]
+
+    def _update(self, address, **changes):
+        with self._lock:
+            pool = self._pool(address)
+            for field, change in changes.items():
+                pool[field] += change
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {address: dict(pool) for address, pool in self._pools.items()}
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, checked_out=-1)
+
+pool_monitor = PoolMonitor()
+command_monitor = CommandMonitor()
+
+def pool_samples(*fields):
+    def collect():
+        for address, pool in pool_monitor.snapshot().items():
+            for field in fields:
+                yield ((address, field) if len(fields) > 1 else (address,)), pool[field]
+    return collect
+
+CallbackMetric(
+    "tms_mongo_pool_connections", "Connections in the driver pool by state",
+    ("address", "state"), pool_samples("open", "checked_out", "waiting")
+)
+CallbackMetric(
+    "tms_mongo_pool_checkouts_total", "Connections checked out of the pool",
+    ("address",), pool_samples("checkouts"), type_name="counter"
+)
+CallbackMetric(
+    "tms_mongo_pool_checkout_failures_total", "Connection checkouts that failed, e.g. on a wait queue timeout",
+    ("address",), pool_samples("checkout_failures"), type_name="counter"
+)
+CallbackMetric(
+    "tms_mongo_pool_cleared_total", "Times the pool was cleared after a network error",
+    ("address",), pool_samples("cleared"), type_name="counter"
+)
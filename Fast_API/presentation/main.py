@@ -1,19 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, UploadFile, File
+from typing import List, Optional
+from datetime import date
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from domain.models import (
-    User, LoginRequest, Student, Teacher, Subject, Class, TeacherAssignment, Payment, Attendance, Grade,
-    EntityCounts, TodayIncome, TodayClassesResponse
+    User, LoginRequest, Student, Teacher, Subject, Class, TeacherAssignment, Payment, Attendance, AttendanceSession, Grade, PaymentStatus,
+    Enrollment, BulkWriteSummary, Job, JobRequest, EntityCounts, TodayIncome, TodayClassesResponse, IncomeGranularity, IncomeSeries
 )
 from application.services import (
     auth_service, student_service, teacher_service, subject_service, class_service,
-    assignment_service, payment_service, attendance_service, grade_service, statistics_service
+    assignment_service, payment_service, attendance_service, grade_service, statistics_service, import_service,
+    job_service, enrollment_service
 )
-from infrastructure.database import init_db
+from application.utils.cache import cache_stats
+from application.utils.pagination import PageParams
+from application.utils.export import ExportParams
+from application.utils.search import backfill_search_keys
+from application.utils.responses import FastJSONResponse, negotiate_response
+from application.utils.versions import conditional_get
+from infrastructure.database import database_health, init_db
+from infrastructure.metrics import CONTENT_TYPE, Counter, Histogram, render_metrics
+from config.settings import ALLOW_USERNAME_AUTH, GZIP_MINIMUM_SIZE, require_secret_key
 from fastapi.security import OAuth2PasswordBearer
+import time
 import uvicorn
 
-app = FastAPI(title="Tuition Class Management System")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+require_secret_key()
+
+app = FastAPI(title="Tuition Class Management System", default_response_class=FastJSONResponse)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 # Configure CORS
 app.add_middleware(
@@ -22,11 +37,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],             
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Compress responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+http_requests = Counter("tms_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+http_request_seconds = Histogram("tms_http_request_duration_seconds", "Time to produce the response headers", ("method", "route"))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template rather than raw path to keep the number of series bounded
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        http_request_seconds.observe(time.perf_counter() - start, request.method, route_path)
+        http_requests.inc(request.method, route_path, str(status))
+
+async def get_current_user(token: Optional[str] = Depends(oauth2_scheme), username: Optional[str] = None) -> dict:
+    """Resolve the caller from a bearer token.
+
+    The legacy username query parameter carries no credential and is only honoured when
+    ALLOW_USERNAME_AUTH is enabled.
+    """
+    if token:
+        return auth_service.verify_access_token(token)
+    if username and ALLOW_USERNAME_AUTH:
+        return await auth_service.resolve_user(username)
+    raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    await payment_service.seed_payment_counter()
+    await statistics_service.ensure_income_rollups()
+    await job_service.fail_interrupted_jobs()
+    job_service.start_job_heartbeat()
+    await backfill_search_keys()
 
 # Authentication Endpoints
 @app.post("/register", status_code=201, tags=["Auth"])
@@ -39,186 +93,297 @@ async def login(request: LoginRequest):
 
 # Student Endpoints
 @app.post("/students", status_code=201, tags=["Students"])
-async def enroll_student(student: Student, username: str):
-    return await student_service.enroll_student(student, username)
+async def enroll_student(student: Student, user: dict = Depends(get_current_user)):
+    return await student_service.enroll_student(student, user)
+
+@app.post("/students/import", tags=["Students"], response_model=BulkWriteSummary)
+async def import_students(file: UploadFile = File(...), user: dict = Depends(get_current_user)):
+    """Enroll students from a CSV file with a header row of Student fields"""
+    return await import_service.import_students(file, user)
+
+@app.get("/students/search", tags=["Students"], response_model=List[Student])
+async def search_students(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50), user: dict = Depends(get_current_user)):
+    """Typeahead: students whose first name, last name or ID starts with q, ignoring case"""
+    return await student_service.search_students(q, limit, user)
 
 @app.get("/students/{student_id}", tags=["Students"])
-async def get_student(student_id: str, username: str):
-    return await student_service.get_student(student_id, username)
+async def get_student(student_id: str, request: Request, user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "students", lambda version: student_service.get_student(student_id, user))
+
+@app.get("/students/{student_id}/payments", tags=["Students"])
+async def get_student_payments(
+    student_id: str,
+    request: Request,
+    month: Optional[str] = None,
+    year: Optional[str] = None,
+    status: Optional[PaymentStatus] = None,
+    page: PageParams = Depends(),
+    user: dict = Depends(get_current_user)
+):
+    """Get a student's payments, newest first, optionally filtered by month, year and status"""
+    return negotiate_response(request, await payment_service.get_student_payments(student_id, user, page, month, year, status))
+
+@app.get("/students/{student_id}/classes", tags=["Students"], response_model=List[Class])
+async def get_student_classes(student_id: str, user: dict = Depends(get_current_user)):
+    return await enrollment_service.get_student_classes(student_id, user)
 
 @app.put("/students/{student_id}", tags=["Students"])
-async def update_student(student_id: str, student: Student, username: str):
-    return await student_service.update_student(student_id, student, username)
+async def update_student(student_id: str, student: Student, user: dict = Depends(get_current_user)):
+    return await student_service.update_student(student_id, student, user)
 
 @app.delete("/students/{student_id}", tags=["Students"])
-async def delete_student(student_id: str, username: str):
-    return await student_service.delete_student(student_id, username)
+async def delete_student(student_id: str, user: dict = Depends(get_current_user)):
+    return await student_service.delete_student(student_id, user)
 
 @app.get("/students", tags=["Students"])
-async def list_students(username: str):
-    return await student_service.list_students(username)
+async def list_students(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "students", lambda version: student_service.list_students(user, page))
 
 # Teacher Endpoints
 @app.post("/teachers", status_code=201, tags=["Teachers"])
-async def add_teacher(teacher: Teacher, username: str):
-    return await teacher_service.add_teacher(teacher, username)
+async def add_teacher(teacher: Teacher, user: dict = Depends(get_current_user)):
+    return await teacher_service.add_teacher(teacher, user)
+
+@app.get("/teachers/search", tags=["Teachers"], response_model=List[Teacher])
+async def search_teachers(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50), user: dict = Depends(get_current_user)):
+    """Typeahead: teachers whose first name, last name or ID starts with q, ignoring case"""
+    return await teacher_service.search_teachers(q, limit, user)
 
 @app.get("/teachers/{teacher_id}", tags=["Teachers"])
-async def get_teacher(teacher_id: str, username: str):
-    return await teacher_service.get_teacher(teacher_id, username)
+async def get_teacher(teacher_id: str, request: Request, user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "teachers", lambda version: teacher_service.get_teacher(teacher_id, user, version))
 
 @app.put("/teachers/{teacher_id}", tags=["Teachers"])
-async def update_teacher(teacher_id: str, teacher: Teacher, username: str):
-    return await teacher_service.update_teacher(teacher_id, teacher, username)
+async def update_teacher(teacher_id: str, teacher: Teacher, user: dict = Depends(get_current_user)):
+    return await teacher_service.update_teacher(teacher_id, teacher, user)
 
 @app.delete("/teachers/{teacher_id}", tags=["Teachers"])
-async def delete_teacher(teacher_id: str, username: str):
-    return await teacher_service.delete_teacher(teacher_id, username)
+async def delete_teacher(teacher_id: str, user: dict = Depends(get_current_user)):
+    return await teacher_service.delete_teacher(teacher_id, user)
 
 @app.get("/teachers", tags=["Teachers"])
-async def list_teachers(username: str):
-    return await teacher_service.list_teachers(username)
+async def list_teachers(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "teachers", lambda version: teacher_service.list_teachers(user, page))
 
 # Subject Endpoints
 @app.post("/subjects", status_code=201, tags=["Subjects"])
-async def add_subject(subject: Subject, username: str):
-    return await subject_service.add_subject(subject, username)
+async def add_subject(subject: Subject, user: dict = Depends(get_current_user)):
+    return await subject_service.add_subject(subject, user)
 
 @app.get("/subjects/{subject_id}", tags=["Subjects"])
-async def get_subject(subject_id: str, username: str):
-    return await subject_service.get_subject(subject_id, username)
+async def get_subject(subject_id: str, request: Request, user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "subjects", lambda version: subject_service.get_subject(subject_id, user, version))
 
 @app.put("/subjects/{subject_id}", tags=["Subjects"])
-async def update_subject(subject_id: str, subject: Subject, username: str):
-    return await subject_service.update_subject(subject_id, subject, username)
+async def update_subject(subject_id: str, subject: Subject, user: dict = Depends(get_current_user)):
+    return await subject_service.update_subject(subject_id, subject, user)
 
 @app.delete("/subjects/{subject_id}", tags=["Subjects"])
-async def delete_subject(subject_id: str, username: str):
-    return await subject_service.delete_subject(subject_id, username)
+async def delete_subject(subject_id: str, user: dict = Depends(get_current_user)):
+    return await subject_service.delete_subject(subject_id, user)
 
 @app.get("/subjects", tags=["Subjects"])
-async def list_subjects(username: str):
-    return await subject_service.list_subjects(username)
+async def list_subjects(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "subjects", lambda version: subject_service.list_subjects(user, page))
 
 # Class Endpoints
 @app.post("/classes", status_code=201, tags=["Classes"])
-async def create_class(class_: Class, username: str):
-    return await class_service.create_class(class_, username)
+async def create_class(class_: Class, user: dict = Depends(get_current_user)):
+    return await class_service.create_class(class_, user)
 
 @app.get("/classes/{class_id}", tags=["Classes"])
-async def get_class(class_id: str, username: str):
-    return await class_service.get_class(class_id, username)
+async def get_class(class_id: str, request: Request, user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "classes", lambda version: class_service.get_class(class_id, user, version))
 
 @app.put("/classes/{class_id}", tags=["Classes"])
-async def update_class(class_id: str, class_: Class, username: str):
-    return await class_service.update_class(class_id, class_, username)
+async def update_class(class_id: str, class_: Class, user: dict = Depends(get_current_user)):
+    return await class_service.update_class(class_id, class_, user)
 
 @app.delete("/classes/{class_id}", tags=["Classes"])
-async def delete_class(class_id: str, username: str):
-    return await class_service.delete_class(class_id, username)
+async def delete_class(class_id: str, user: dict = Depends(get_current_user)):
+    return await class_service.delete_class(class_id, user)
 
 @app.get("/classes", tags=["Classes"])
-async def list_classes(username: str):
-    return await class_service.list_classes(username)
+async def list_classes(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return await conditional_get(request, "classes", lambda version: class_service.list_classes(user, page))
 
 @app.get("/classes/{class_id}/details", tags=["Classes"])
-async def get_class_details(class_id: str, username: str):
-    return await class_service.get_class_students_and_teacher(class_id, username)
+async def get_class_details(class_id: str, user: dict = Depends(get_current_user)):
+    return await class_service.get_class_students_and_teacher(class_id, user)
+
+@app.post("/classes/{class_id}/students/{student_id}", status_code=201, tags=["Classes"], response_model=Enrollment)
+async def enroll_in_class(class_id: str, student_id: str, user: dict = Depends(get_current_user)):
+    return await enrollment_service.enroll_in_class(class_id, student_id, user)
+
+@app.delete("/classes/{class_id}/students/{student_id}", tags=["Classes"])
+async def unenroll_from_class(class_id: str, student_id: str, user: dict = Depends(get_current_user)):
+    return await enrollment_service.unenroll_from_class(class_id, student_id, user)
 
 # Teacher Assignment Endpoints
 @app.post("/assignments", status_code=201, tags=["Assignments"])
-async def assign_teacher_to_class(assignment: TeacherAssignment, username: str):
-    return await assignment_service.assign_teacher_to_class(assignment, username)
+async def assign_teacher_to_class(assignment: TeacherAssignment, user: dict = Depends(get_current_user)):
+    return await assignment_service.assign_teacher_to_class(assignment, user)
 
 @app.get("/assignments", tags=["Assignments"])
-async def list_teacher_assignments(username: str):
-    return await assignment_service.list_teacher_assignments(username)
+async def list_teacher_assignments(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return negotiate_response(request, await assignment_service.list_teacher_assignments(user, page))
 
 @app.put("/assignments/{assignment_id}", tags=["Assignments"])
-async def update_teacher_assignment(assignment_id: str, assignment: TeacherAssignment, username: str):
-    return await assignment_service.update_teacher_assignment(assignment_id, assignment, username)
+async def update_teacher_assignment(assignment_id: str, assignment: TeacherAssignment, user: dict = Depends(get_current_user)):
+    return await assignment_service.update_teacher_assignment(assignment_id, assignment, user)
 
 @app.delete("/assignments/{assignment_id}", tags=["Assignments"])
-async def delete_teacher_assignment(assignment_id: str, username: str):
-    return await assignment_service.delete_teacher_assignment(assignment_id, username)
+async def delete_teacher_assignment(assignment_id: str, user: dict = Depends(get_current_user)):
+    return await assignment_service.delete_teacher_assignment(assignment_id, user)
 
 # Payment Endpoints
 @app.post("/payments", status_code=201, tags=["Payments"])
-async def process_payment(payment: Payment, username: str):
-    return await payment_service.process_payment(payment, username)
+async def process_payment(payment: Payment, user: dict = Depends(get_current_user)):
+    return await payment_service.process_payment(payment, user)
 
 @app.get("/payments", tags=["Payments"])
-async def get_all_payments(username: str):
-    return await payment_service.get_all_payments(username)
+async def get_all_payments(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return negotiate_response(request, await payment_service.get_all_payments(user, page))
+
+@app.get("/payments/export", tags=["Payments"])
+async def export_payments(params: ExportParams = Depends(), user: dict = Depends(get_current_user)):
+    """Stream payments matching the filters as NDJSON or a JSON array"""
+    return await payment_service.export_payments(user, params)
 
 @app.put("/payments/{payment_id}", tags=["Payments"])
-async def update_payment(payment_id: str, payment: Payment, username: str):
-    return await payment_service.update_payment(payment_id, payment, username)
+async def update_payment(payment_id: str, payment: Payment, user: dict = Depends(get_current_user)):
+    return await payment_service.update_payment(payment_id, payment, user)
 
 @app.delete("/payments/{payment_id}", tags=["Payments"])
-async def delete_payment(payment_id: str, username: str):
-    return await payment_service.delete_payment(payment_id, username)
+async def delete_payment(payment_id: str, user: dict = Depends(get_current_user)):
+    return await payment_service.delete_payment(payment_id, user)
 
 # Attendance Endpoints
 @app.post("/attendance", status_code=201, tags=["Attendance"])
-async def record_attendance(attendance: Attendance, username: str):
-    return await attendance_service.record_attendance(attendance, username)
+async def record_attendance(attendance: Attendance, user: dict = Depends(get_current_user)):
+    return await attendance_service.record_attendance(attendance, user)
+
+@app.post("/attendance/bulk", tags=["Attendance"], response_model=BulkWriteSummary)
+async def record_attendance_bulk(session: AttendanceSession, user: dict = Depends(get_current_user)):
+    """Record attendance for a whole class session, reporting failures per row"""
+    return await attendance_service.record_attendance_bulk(session, user)
 
 @app.get("/attendance", tags=["Attendance"])
-async def get_all_attendance(username: str):
-    return await attendance_service.get_all_attendance(username)
+async def get_all_attendance(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return negotiate_response(request, await attendance_service.get_all_attendance(user, page))
+
+@app.get("/attendance/export", tags=["Attendance"])
+async def export_attendance(params: ExportParams = Depends(), user: dict = Depends(get_current_user)):
+    """Stream attendance matching the filters as NDJSON or a JSON array"""
+    return await attendance_service.export_attendance(user, params)
 
 @app.put("/attendance/{attendance_id}", tags=["Attendance"])
-async def update_attendance(attendance_id: str, attendance: Attendance, username: str):
-    return await attendance_service.update_attendance(attendance_id, attendance, username)
+async def update_attendance(attendance_id: str, attendance: Attendance, user: dict = Depends(get_current_user)):
+    return await attendance_service.update_attendance(attendance_id, attendance, user)
 
 @app.delete("/attendance/{attendance_id}", tags=["Attendance"])
-async def delete_attendance(attendance_id: str, username: str):
-    return await attendance_service.delete_attendance(attendance_id, username)
+async def delete_attendance(attendance_id: str, user: dict = Depends(get_current_user)):
+    return await attendance_service.delete_attendance(attendance_id, user)
 
 # Grade Endpoints
 @app.post("/grades", status_code=201, tags=["Grades"])
-async def record_grade(grade: Grade, username: str):
-    return await grade_service.record_grade(grade, username)
+async def record_grade(grade: Grade, user: dict = Depends(get_current_user)):
+    return await grade_service.record_grade(grade, user)
+
+@app.post("/grades/import", tags=["Grades"], response_model=BulkWriteSummary)
+async def import_grades(file: UploadFile = File(...), user: dict = Depends(get_current_user)):
+    """Record grades from a CSV file with a header row of Grade fields"""
+    return await import_service.import_grades(file, user)
 
 @app.get("/grades", tags=["Grades"])
-async def get_all_grades(username: str):
-    return await grade_service.get_all_grades(username)
+async def get_all_grades(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return negotiate_response(request, await grade_service.get_all_grades(user, page))
+
+@app.get("/grades/export", tags=["Grades"])
+async def export_grades(params: ExportParams = Depends(), user: dict = Depends(get_current_user)):
+    """Stream grades matching the filters as NDJSON or a JSON array"""
+    return await grade_service.export_grades(user, params)
 
 @app.put("/grades/{grade_id}", tags=["Grades"])
-async def update_grade(grade_id: str, grade: Grade, username: str):
-    return await grade_service.update_grade(grade_id, grade, username)
+async def update_grade(grade_id: str, grade: Grade, user: dict = Depends(get_current_user)):
+    return await grade_service.update_grade(grade_id, grade, user)
 
 @app.delete("/grades/{grade_id}", tags=["Grades"])
-async def delete_grade(grade_id: str, username: str):
-    return await grade_service.delete_grade(grade_id, username)
+async def delete_grade(grade_id: str, user: dict = Depends(get_current_user)):
+    return await grade_service.delete_grade(grade_id, user)
 
 # Stats Endpoints
 @app.get("/stats/counts", tags=["Stats"], response_model=EntityCounts)
-async def get_entity_counts(username: str):
+async def get_entity_counts(user: dict = Depends(get_current_user)):
     """Get counts of all entities (students, teachers, subjects, classes, etc.)"""
-    return await statistics_service.get_entity_counts(username)
+    return await statistics_service.get_entity_counts(user)
 
 @app.get("/stats/today-income", tags=["Stats"], response_model=TodayIncome)
-async def get_today_income(username: str):
+async def get_today_income(user: dict = Depends(get_current_user)):
     """Get total income from payments made today"""
-    return await statistics_service.get_today_income(username)
+    return await statistics_service.get_today_income(user)
+
+@app.get("/stats/income", tags=["Stats"], response_model=IncomeSeries)
+async def get_income_series(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    granularity: IncomeGranularity = IncomeGranularity.day,
+    user: dict = Depends(get_current_user)
+):
+    """Get paid income per day, week or month between two dates, from the daily rollups"""
+    return await statistics_service.get_income_series(date_from, date_to, granularity, user)
 
 @app.get("/stats/today-classes", tags=["Stats"], response_model=TodayClassesResponse)
 async def get_today_classes(day: str):
     """Get all classes scheduled for a specified day with their records"""
     return await statistics_service.get_today_classes(day)
 
-# Maintenance Endpoints
-@app.get("/clean-payments", tags=["Maintenance"])
-async def clean_payments_endpoint():
-    await payment_service.clean_payments()
-    return {"message": "Payments collection cleaned"}
-
-@app.get("/clean-classes", tags=["Maintenance"])
-async def clean_classes_endpoint():
-    await class_service.clean_classes()
-    return {"message": "Classes collection cleaned"}
+@app.get("/stats/cache", tags=["Stats"])
+async def get_cache_stats(user: dict = Depends(get_current_user)):
+    """Get hit/miss counters of the in-process caches"""
+    return cache_stats()
+
+@app.get("/metrics", tags=["Stats"])
+async def get_metrics():
+    """Prometheus text format: HTTP and MongoDB command latencies, connection pool gauges and cache counters"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/health/db", tags=["Stats"])
+async def get_database_health():
+    """Report MongoDB reachability, ping latency, client options and live connection pool usage"""
+    health = await database_health()
+    return FastJSONResponse(health, status_code=200 if health["status"] == "ok" else 503)
+
+# Job Endpoints
+@app.post("/jobs", status_code=202, tags=["Jobs"], response_model=Job)
+async def submit_job(request: JobRequest, user: dict = Depends(get_current_user)):
+    """Start a background job; poll GET /jobs/{job_id} for its progress and result"""
+    return await job_service.submit_job(request, user)
+
+@app.get("/jobs/{job_id}", tags=["Jobs"], response_model=Job)
+async def get_job(job_id: str, user: dict = Depends(get_current_user)):
+    return await job_service.get_job(job_id, user)
+
+@app.get("/jobs", tags=["Jobs"])
+async def list_jobs(request: Request, page: PageParams = Depends(), user: dict = Depends(get_current_user)):
+    return negotiate_response(request, await job_service.list_jobs(user, page))
+
+@app.post("/jobs/{job_id}/cancel", tags=["Jobs"], response_model=Job)
+async def cancel_job(job_id: str, user: dict = Depends(get_current_user)):
+    return await job_service.cancel_job(job_id, user)
+
+# Maintenance Endpoints (run as background jobs)
+@app.post("/clean-payments", status_code=202, tags=["Maintenance"], response_model=Job)
+async def clean_payments_endpoint(dry_run: bool = False, user: dict = Depends(get_current_user)):
+    return await job_service.submit_job(JobRequest(type="clean-payments", params={"dry_run": dry_run}), user)
+
+@app.post("/clean-classes", status_code=202, tags=["Maintenance"], response_model=Job)
+async def clean_classes_endpoint(user: dict = Depends(get_current_user)):
+    return await job_service.submit_job(JobRequest(type="clean-classes"), user)
+
+@app.post("/rebuild-income-rollups", status_code=202, tags=["Maintenance"], response_model=Job)
+async def rebuild_income_rollups_endpoint(user: dict = Depends(get_current_user)):
+    return await job_service.submit_job(JobRequest(type="rebuild-income-rollups"), user)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
@@ -85,62 +85,23 @@ export class AddStudentComponent {
 
   importCsv() {
     if (this.selectedFile) {
-      const reader = new FileReader();
-      reader.onload = (e) => {
-        const text = e.target?.result as string;
-        const students = this.parseCsv(text);
-        if (students.length > 0) {
-          this.apiService.importStudents(students).subscribe({
-            next: (response) => {
-              this.showSnackBar(this.getTranslation('csv_import_success'));
-              this.closeImportModal();
-            },
-            error: (err) => {
-              console.error('Error importing students:', err);
-              this.showSnackBar(this.getTranslation('csv_import_failed'));
-            }
-          });
-        } else {
+      this.apiService.importStudents(this.selectedFile).subscribe({
+        next: (response) => {
+          if (response && response.inserted > 0) {
+            this.showSnackBar(this.getTranslation('csv_import_success'));
+            this.closeImportModal();
+          } else {
+            this.showSnackBar(this.getTranslation('csv_import_failed'));
+          }
+        },
+        error: (err) => {
+          console.error('Error importing students:', err);
           this.showSnackBar(this.getTranslation('csv_import_failed'));
         }
-      };
-      reader.readAsText(this.selectedFile);
+      });
     }
   }
 
-  private parseCsv(data: string): Student[] {
-    const students: Student[] = [];
-    const rows = data.split('\n').slice(1);
-    rows.forEach((row) => {
-      const [
-        student_id,
-        first_name,
-        last_name,
-        date_of_birth,
-        gender,
-        contact_number,
-        email,
-        address,
-        enrollment_date,
-      ] = row.split(',').map((item) => item.trim());
-      if (first_name && last_name) {
-        students.push({
-          student_id,
-          first_name,
-          last_name,
-          date_of_birth,
-          gender,
-          contact_number,
-          email,
-          address,
-          enrollment_date,
-          status: 'Active',
-        });
-      }
-    });
-    return students;
-  }
-
   onSubmit() {
     if (this.isFormValid()) {
       this.apiService.addStudent(this.student).subscribe({
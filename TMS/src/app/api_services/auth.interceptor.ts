@@ -0,0 +1,12 @@
+import { HttpInterceptorFn } from '@angular/common/http';
+
+export const ACCESS_TOKEN_KEY = 'access_token';
+
+// Sends the access token returned by /login with every API request
+export const authInterceptor: HttpInterceptorFn = (req, next) => {
+  const token = localStorage.getItem(ACCESS_TOKEN_KEY);
+  if (!token || req.headers.has('Authorization')) {
+    return next(req);
+  }
+  return next(req.clone({ setHeaders: { Authorization: `Bearer ${token}` } }));
+};
@@ -1,9 +1,10 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpHeaders } from '@angular/common/http';
-import { catchError, Observable, throwError } from 'rxjs';
+import { catchError, map, Observable, throwError } from 'rxjs';
 import { Student } from '../models/student.model';
 import { Teacher } from '../models/teacher.model';
 import { Class } from '../models/class.model';
+import { Payment as PaymentRecord } from '../models/payment.model';
 
 export interface StatsCounts {
   students: number;
@@ -24,6 +25,40 @@ export interface Subject {
   level: string;
 }
 
+export interface IncomePoint {
+  period: string;
+  income: number;
+  payments: number;
+}
+
+export interface IncomeSeries {
+  granularity: string;
+  date_from: string;
+  date_to: string;
+  points: IncomePoint[];
+}
+
+// Opt-in list encoding: field names once, then one array of values per field
+export const COLUMNAR_MEDIA_TYPE = 'application/vnd.tms.columnar+json';
+
+export interface ColumnarPage {
+  fields: string[];
+  columns: any[][];
+  count: number;
+  next_cursor: string | null;
+}
+
+export interface PaymentPage {
+  items: PaymentRecord[];
+  next_cursor: string | null;
+}
+
+export interface PaymentFilters {
+  month?: string;
+  year?: string;
+  status?: string;
+}
+
 interface Payment {
   
   student_id: string;
@@ -103,18 +138,15 @@ export class ApiService {
       );
   }
 
-  importStudents(students: Student[]): Observable<any> {
+  importStudents(file: File): Observable<any> {
     const username = this.getUsername();
     if (!username) {
       return throwError(() => new Error('Username not found in local storage'));
     }
-    const studentsJson = JSON.stringify(students);
+    const formData = new FormData();
+    formData.append('file', file);
     return this.http
-      .post(`${this.baseUrl}/students/import/?username=${encodeURIComponent(username)}`, studentsJson, {
-        headers: new HttpHeaders({
-          'Content-Type': 'application/json',
-        }),
-      })
+      .post(`${this.baseUrl}/students/import?username=${encodeURIComponent(username)}`, formData)
       .pipe(
         catchError((error) => {
           return throwError(() => new Error('Failed to import students'));
@@ -127,15 +159,42 @@ export class ApiService {
     if (!username) {
       return throwError(() => new Error('Username not found in local storage'));
     }
-    return this.http
-      .get<Student[]>(`${this.baseUrl}/students/?username=${encodeURIComponent(username)}`, {
-        headers: new HttpHeaders({
-          'Content-Type': 'application/json',
-        }),
+    // The full student table is the largest list the app loads, so it is fetched in the columnar encoding
+    return this.getColumnarList<Student>(`/students/?username=${encodeURIComponent(username)}&all=true`).pipe(
+      catchError((error) => {
+        return throwError(() => new Error('Failed to fetch students'));
       })
+    );
+  }
+
+  searchStudents(q: string, limit: number = 10): Observable<Student[]> {
+    const username = this.getUsername();
+    if (!username) {
+      return throwError(() => new Error('Username not found in local storage'));
+    }
+    return this.http
+      .get<Student[]>(
+        `${this.baseUrl}/students/search?q=${encodeURIComponent(q)}&limit=${limit}&username=${encodeURIComponent(username)}`
+      )
+      .pipe(
+        catchError((error) => {
+          return throwError(() => new Error('Failed to search students'));
+        })
+      );
+  }
+
+  searchTeachers(q: string, limit: number = 10): Observable<Teacher[]> {
+    const username = this.getUsername();
+    if (!username) {
+      return throwError(() => new Error('Username not found in local storage'));
+    }
+    return this.http
+      .get<Teacher[]>(
+        `${this.baseUrl}/teachers/search?q=${encodeURIComponent(q)}&limit=${limit}&username=${encodeURIComponent(username)}`
+      )
       .pipe(
         catchError((error) => {
-          return throwError(() => new Error('Failed to fetch students'));
+          return throwError(() => new Error('Failed to search teachers'));
         })
       );
   }
@@ -186,7 +245,7 @@ export class ApiService {
       return throwError(() => new Error('Username not found in local storage'));
     }
     return this.http
-      .get<Teacher[]>(`${this.baseUrl}/teachers/?username=${encodeURIComponent(username)}`, {
+      .get<Teacher[]>(`${this.baseUrl}/teachers/?username=${encodeURIComponent(username)}&all=true`, {
         headers: new HttpHeaders({
           'Content-Type': 'application/json',
         }),
@@ -321,7 +380,7 @@ export class ApiService {
       return throwError(() => new Error('Username not found in local storage'));
     }
     return this.http
-      .get<any>(`${this.baseUrl}/subjects/?username=${encodeURIComponent(username)}`, {
+      .get<any>(`${this.baseUrl}/subjects/?username=${encodeURIComponent(username)}&all=true`, {
         headers: new HttpHeaders({
           'Content-Type': 'application/json',
         }),
@@ -338,7 +397,7 @@ export class ApiService {
     if (!username) {
       throw new Error('Username not found in local storage');
     }
-    return this.http.get<Class[]>(`${this.baseUrl}/classes/?username=${username}`);
+    return this.http.get<Class[]>(`${this.baseUrl}/classes/?username=${username}&all=true`);
   }
 
   // getTodayClasses
@@ -350,6 +409,23 @@ export class ApiService {
     return this.http.get<{ today_classes: any[], date: string }>(`${this.baseUrl}/stats/today-classes?day=${day}`);
   }
 
+  getIncomeSeries(from: string, to: string, granularity: 'day' | 'week' | 'month' = 'day'): Observable<IncomeSeries> {
+    const username = this.getUsername();
+    if (!username) {
+      return throwError(() => new Error('Username not found in local storage'));
+    }
+    return this.http
+      .get<IncomeSeries>(
+        `${this.baseUrl}/stats/income?from=${from}&to=${to}&granularity=${granularity}&username=${encodeURIComponent(username)}`
+      )
+      .pipe(
+        catchError((error) => {
+          console.error('Error fetching income series:', error);
+          return throwError(() => new Error('Failed to fetch income series'));
+        })
+      );
+  }
+
   makePayment(payment: Payment, username: string): Observable<{ success: boolean, message?: string }> {
     return this.http.post<{ success: boolean, message?: string }>(
       `${this.baseUrl}/payments?username=${username}`,
@@ -357,8 +433,53 @@ export class ApiService {
     );
   }
 
-  getPayments(username: string): Observable<Payment[]> {
-    return this.http.get<Payment[]>(`${this.baseUrl}/payments?username=${username}`);
+  getStudentPayments(studentId: string, filters: PaymentFilters = {}, after: string | null = null, limit: number = 100): Observable<PaymentPage> {
+    const username = this.getUsername();
+    if (!username) {
+      return throwError(() => new Error('Username not found in local storage'));
+    }
+    let query = `username=${encodeURIComponent(username)}&limit=${limit}`;
+    if (filters.month) {
+      query += `&month=${encodeURIComponent(filters.month)}`;
+    }
+    if (filters.year) {
+      query += `&year=${encodeURIComponent(filters.year)}`;
+    }
+    if (filters.status) {
+      query += `&status=${encodeURIComponent(filters.status)}`;
+    }
+    if (after) {
+      query += `&after=${encodeURIComponent(after)}`;
+    }
+    return this.http
+      .get<PaymentPage>(`${this.baseUrl}/students/${encodeURIComponent(studentId)}/payments?${query}`)
+      .pipe(
+        catchError((error) => {
+          console.error('Error fetching student payments:', error);
+          return throwError(() => new Error('Failed to fetch student payments'));
+        })
+      );
+  }
+
+  // Fetches a list endpoint in the columnar encoding, which is much smaller for big tables, and rebuilds the rows
+  getColumnarList<T>(pathAndQuery: string): Observable<T[]> {
+    return this.http
+      .get<ColumnarPage>(`${this.baseUrl}${pathAndQuery}`, {
+        headers: new HttpHeaders({ Accept: COLUMNAR_MEDIA_TYPE }),
+      })
+      .pipe(map((page) => this.fromColumns<T>(page)));
+  }
+
+  private fromColumns<T>(page: ColumnarPage): T[] {
+    const rows: T[] = new Array(page.count);
+    for (let i = 0; i < page.count; i++) {
+      const row: any = {};
+      page.fields.forEach((field, column) => {
+        row[field] = page.columns[column][i];
+      });
+      rows[i] = row as T;
+    }
+    return rows;
   }
 }
 
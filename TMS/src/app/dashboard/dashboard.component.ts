@@ -2,7 +2,7 @@ import { Component, OnInit } from '@angular/core';
 import { NgFor } from '@angular/common';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 import { LanguageService } from '../language.service';
-import { ApiService, StatsCounts } from '../api_services/services';
+import { ApiService, IncomeSeries, StatsCounts } from '../api_services/services';
 import { Class } from '../models/class.model';
 
 interface ClassDisplay {
@@ -52,6 +52,7 @@ export class DashboardComponent implements OnInit {
   ngOnInit(): void {
     this.fetchStats();
     this.fetchTodayClasses();
+    this.updateIncomes();
   }
 
   getTranslation(key: string): string {
@@ -125,16 +126,30 @@ export class DashboardComponent implements OnInit {
   }
 
   updateIncomes() {
-    this.incomes = [
-      { date: 'May 12', income: 0 },
-      { date: 'May 13', income: 2400 },
-      { date: 'May 14', income: 700 },
-      { date: 'May 15', income: 300 },
-      { date: 'May 16', income: 1100 },
-      { date: 'May 17', income: 1200 },
-      { date: 'May 18', income: 500 }
-    ];
-    this.updateYAxis();
+    const to = new Date();
+    const from = new Date(to);
+    from.setDate(to.getDate() - 6);
+    this.apiService.getIncomeSeries(this.toIsoDate(from), this.toIsoDate(to)).subscribe({
+      next: (series: IncomeSeries) => {
+        this.incomes = series.points.map(point => ({
+          date: new Date(`${point.period}T00:00:00`).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+          income: point.income
+        }));
+        const today = series.points[series.points.length - 1];
+        this.todayIncome = `LKR ${this.formatIncome(today ? today.income : 0)}`;
+        this.updateYAxis();
+      },
+      error: (err) => {
+        console.error('Error fetching income series:', err);
+        this.showSnackBar(this.getTranslation('fetch_stats_failed'));
+      }
+    });
+  }
+
+  private toIsoDate(date: Date): string {
+    const month = (date.getMonth() + 1).toString().padStart(2, '0');
+    const day = date.getDate().toString().padStart(2, '0');
+    return `${date.getFullYear()}-${month}-${day}`;
   }
 
   trackByDate(index: number, item: { date: string; income: number }): string {
@@ -2,6 +2,7 @@ import { Component } from '@angular/core';
 import { FormsModule } from '@angular/forms';
 import { Router } from '@angular/router';
 import { LanguageService } from '../language.service';
+import { ACCESS_TOKEN_KEY } from '../api_services/auth.interceptor';
 import { ApiService } from '../api_services/services';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 import { NgIf } from '@angular/common';
@@ -48,9 +49,9 @@ export class LoginComponent {
         }).subscribe({
           next: (response) => {
             if (response && response.message === 'Registration successful') {
-              localStorage.setItem('username', this.regUsername);
               this.showSnackBar(this.getTranslation('register_success'));
-              this.router.navigate(['/dashboard']);
+              // Log in straight away to obtain an access token for the new account
+              this.logIn(this.regUsername, this.regPassword);
             } else {
               this.showSnackBar(this.getTranslation('register_failed'));
             }
@@ -66,26 +67,31 @@ export class LoginComponent {
     } else {
       // Handle login
       if (this.username && this.password) {
-        this.apiService.login({ username: this.username, password: this.password }).subscribe({
-          next: (response) => {
-            if (response && response.message === 'Login successful') {
-              localStorage.setItem('username', this.username);
-              this.router.navigate(['/dashboard']);
-            } else {
-              this.showSnackBar(this.getTranslation('login_failed'));
-            }
-          },
-          error: (err) => {
-            console.error('Login error:', err);
-            this.showSnackBar(this.getTranslation('login_failed'));
-          }
-        });
+        this.logIn(this.username, this.password);
       } else {
         this.showSnackBar(this.getTranslation('login_failed'));
       }
     }
   }
 
+  private logIn(username: string, password: string): void {
+    this.apiService.login({ username, password }).subscribe({
+      next: (response) => {
+        if (response && response.message === 'Login successful' && response.access_token) {
+          localStorage.setItem(ACCESS_TOKEN_KEY, response.access_token);
+          localStorage.setItem('username', username);
+          this.router.navigate(['/dashboard']);
+        } else {
+          this.showSnackBar(this.getTranslation('login_failed'));
+        }
+      },
+      error: (err) => {
+        console.error('Login error:', err);
+        this.showSnackBar(this.getTranslation('login_failed'));
+      }
+    });
+  }
+
   showLogin(): void {
     this.showRegisterForm = false;
     this.regUsername = '';
@@ -6,7 +6,7 @@ import { ApiService } from '../api_services/services';
 import { Student } from '../models/student.model';
 import { Payment } from '../models/payment.model';
 import { Observable, of } from 'rxjs';
-import { map, startWith, tap } from 'rxjs/operators';
+import { catchError, debounceTime, distinctUntilChanged, startWith, switchMap, tap } from 'rxjs/operators';
 
 @Component({
   selector: 'app-payment-details',
@@ -16,9 +16,9 @@ import { map, startWith, tap } from 'rxjs/operators';
   styleUrl: './payment-details.component.css'
 })
 export class PaymentDetailsComponent implements OnInit {
-  students: Student[] = [];
-  payments: Payment[] = [];
-  studentPayments: Payment[] = []; // Payments for selected student
+  studentPayments: Payment[] = []; // Payments for selected student, fetched page by page
+  nextCursor: string | null = null;
+  loadingPayments = false;
   searchForm: FormGroup;
   filteredStudents: Observable<Student[]> = of([]);
   selectedStudent: Student | null = null;
@@ -49,65 +49,31 @@ export class PaymentDetailsComponent implements OnInit {
   }
 
   ngOnInit(): void {
-    this.fetchStudents();
-    this.fetchPayments();
     this.setupAutocomplete();
   }
 
-  private fetchStudents(): void {
-    this.apiService.getStudents().subscribe({
-      next: (students) => {
-        console.log('Fetched students:', students);
-        this.students = students || [];
-      },
-      error: (err) => {
-        console.error('Error fetching students:', err);
-        this.showSnackBar('Failed to load students');
-        this.students = [];
-        this.filteredStudents = of([]);
-      }
-    });
-  }
-
-  private fetchPayments(): void {
-    this.apiService.getPayments('string').subscribe({
-      next: (payments) => {
-        console.log('Fetched payments:', payments);
-        this.payments = (payments || []).map((p: any) => ({
-          payment_id: p.payment_id ?? '',
-          student_id: p.student_id ?? '',
-          class_id: p.class_id ?? '',
-          amount: p.amount ?? 0,
-          payment_date: p.payment_date ?? '',
-          month: p.month ?? '',
-          year: p.year ?? '',
-          status: p.status ?? ''
-        }));
-      },
-      error: (err) => {
-        console.error('Error fetching payments:', err);
-        this.showSnackBar('Failed to load payments');
-        this.payments = [];
-      }
-    });
-  }
-
   private setupAutocomplete(): void {
     this.filteredStudents = this.searchForm.get('searchInput')!.valueChanges.pipe(
       startWith(''),
-      map(value => this.filterStudents(value || '')),
+      debounceTime(200),
+      distinctUntilChanged(),
+      switchMap(value => this.searchStudents(value || '')),
       tap(filtered => console.log('Filtered students:', filtered))
     );
   }
 
-  private filterStudents(value: string): Student[] {
-    if (!value) {
-      return [];
+  private searchStudents(value: string): Observable<Student[]> {
+    const query = value.trim();
+    if (!query) {
+      return of([]);
     }
-    const filterValue = value.toLowerCase();
-    return this.students.filter(student =>
-      student.first_name.toLowerCase().startsWith(filterValue)
-    ) || [];
+    return this.apiService.searchStudents(query).pipe(
+      catchError((err) => {
+        console.error('Error searching students:', err);
+        this.showSnackBar('Failed to search students');
+        return of([]);
+      })
+    );
   }
 
   getStudentName(student: Student): string {
@@ -116,20 +82,47 @@ export class PaymentDetailsComponent implements OnInit {
 
   selectStudent(student: Student): void {
     this.selectedStudent = student;
-    this.searchForm.get('searchInput')?.setValue(this.getStudentName(student));
-    this.filteredStudents = of([]);
-    // Filter and log payments for the selected student
-    this.studentPayments = this.payments.filter(payment =>
-      payment.student_id.toLowerCase() === student.student_id.toLowerCase()
-    );
-    console.log(`Payments for ${this.getStudentName(student)} (ID: ${student.student_id}):`, this.studentPayments);
-    if (this.studentPayments.length > 0) {
-      this.showSnackBar(`Found ${this.studentPayments.length} payment(s) for ${this.getStudentName(student)}`);
-    } else {
-      this.showSnackBar(`No payments found for ${this.getStudentName(student)}`);
+    this.searchForm.get('searchInput')?.setValue(this.getStudentName(student), { emitEvent: false });
+    this.setupAutocomplete(); // Clear the suggestions until the user types again
+    this.studentPayments = [];
+    this.nextCursor = null;
+    this.loadStudentPayments(student, true);
+  }
+
+  loadMorePayments(): void {
+    if (this.selectedStudent && this.nextCursor) {
+      this.loadStudentPayments(this.selectedStudent, false);
     }
   }
 
+  private loadStudentPayments(student: Student, firstPage: boolean): void {
+    this.loadingPayments = true;
+    this.apiService.getStudentPayments(student.student_id, {}, this.nextCursor).subscribe({
+      next: (page) => {
+        this.loadingPayments = false;
+        if (this.selectedStudent !== student) {
+          return; // Another student was selected while this page was loading
+        }
+        this.studentPayments = [...this.studentPayments, ...(page.items || [])];
+        this.nextCursor = page.next_cursor;
+        console.log(`Payments for ${this.getStudentName(student)} (ID: ${student.student_id}):`, this.studentPayments);
+        if (!firstPage) {
+          return;
+        }
+        if (this.studentPayments.length > 0) {
+          this.showSnackBar(`Found ${this.studentPayments.length}${this.nextCursor ? '+' : ''} payment(s) for ${this.getStudentName(student)}`);
+        } else {
+          this.showSnackBar(`No payments found for ${this.getStudentName(student)}`);
+        }
+      },
+      error: (err) => {
+        this.loadingPayments = false;
+        console.error('Error fetching payments:', err);
+        this.showSnackBar('Failed to load payments');
+      }
+    });
+  }
+
   getMonthName(month: string): string {
     const monthObj = this.months.find(m => m.value === month);
     return monthObj ? monthObj.name : month;
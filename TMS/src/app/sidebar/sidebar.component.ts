@@ -2,6 +2,7 @@ import { NgClass } from '@angular/common';
 import { Component, OnInit, OnDestroy } from '@angular/core';
 import { Router, RouterLink, RouterLinkActive, RouterOutlet } from '@angular/router';
 import { LanguageService } from '../language.service';
+import { ACCESS_TOKEN_KEY } from '../api_services/auth.interceptor';
 import { ClassLanguageService } from '../languages/class.language';
 import { TeacherLanguageService } from '../languages/teacher.language';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
@@ -103,6 +104,7 @@ export class SidebarComponent implements OnInit, OnDestroy {
   }
 
   logout(): void {
+    localStorage.removeItem(ACCESS_TOKEN_KEY);
     localStorage.removeItem('username');
     localStorage.removeItem('day');
     this.snackBar.open(this.getTranslation('logout_success'), 'Close', {